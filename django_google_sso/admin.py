@@ -40,7 +40,7 @@ if admin.site.is_registered(CurrentUserModel):
 
 class GoogleSSOInlineAdmin(admin.StackedInline):
     model = GoogleSSOUser
-    readonly_fields = ("google_id",)
+    readonly_fields = ("google_id", "email", "email_domain")
     extra = 0
 
     def has_add_permission(self, request, obj):
@@ -50,7 +50,7 @@ class GoogleSSOInlineAdmin(admin.StackedInline):
 @admin.register(GoogleSSOUser)
 class GoogleSSOAdmin(admin.ModelAdmin):
     list_display = ("user", "google_id")
-    readonly_fields = ("google_id", "picture")
+    readonly_fields = ("google_id", "email", "email_domain", "picture")
 
     def has_add_permission(self, request):
         return False
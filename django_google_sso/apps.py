@@ -1,4 +1,6 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -8,4 +10,21 @@ class DjangoGoogleSsoConfig(AppConfig):
     verbose_name = _("Google SSO User")
 
     def ready(self):
+        import django_google_sso.checks.warnings
         import django_google_sso.templatetags  # noqa
+        from django_google_sso.main import clear_superuser_cache, sync_sso_user_email
+        from django_google_sso.registry import build_registry
+        from django_google_sso.templatetags.sso_tags import build_provider_registry
+
+        build_registry()
+        build_provider_registry()
+
+        post_save.connect(clear_superuser_cache, sender=settings.AUTH_USER_MODEL)
+        post_delete.connect(clear_superuser_cache, sender=settings.AUTH_USER_MODEL)
+        post_save.connect(sync_sso_user_email, sender=settings.AUTH_USER_MODEL)
+
+        if apps.is_installed("django.contrib.sites"):
+            from django_google_sso.helpers import clear_site_cache
+
+            post_save.connect(clear_site_cache, sender="sites.Site")
+            post_delete.connect(clear_site_cache, sender="sites.Site")
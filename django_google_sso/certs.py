@@ -0,0 +1,198 @@
+import base64
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import requests
+from django.core.cache import caches
+from google.auth import jwt
+from google.auth.exceptions import GoogleAuthError
+from loguru import logger
+
+from django_google_sso import conf
+from django_google_sso.transport import get_http_session
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+CERTS_CACHE_KEY = "django_google_sso:certs"
+CERTS_LOCK_KEY = "django_google_sso:certs:lock"
+CERTS_LOCK_TIMEOUT = 10  # seconds
+CERTS_LOCK_WAIT = 2  # seconds
+CERTS_LOCK_POLL_INTERVAL = 0.05  # seconds
+CERTS_DEFAULT_MAX_AGE = 300  # seconds
+CERTS_MIN_REFRESH_INTERVAL = 30  # seconds
+CERTS_STALE_MAX_AGE = 3600  # seconds to keep expired certificates, for outages
+LOCAL_CACHE_SIZE = 16
+
+_max_age_pattern = re.compile(r"max-age=(\d+)")
+_local_certs: OrderedDict[str, tuple[str, float]] = OrderedDict()
+_local_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def _get_cache():
+    return caches[conf.GOOGLE_SSO_CACHE_ALIAS]
+
+
+def _get_max_age(cache_control: str) -> int:
+    match = _max_age_pattern.search(cache_control or "")
+    return int(match.group(1)) if match else CERTS_DEFAULT_MAX_AGE
+
+
+def _get_local_cert(kid: str) -> str | None:
+    with _local_lock:
+        entry = _local_certs.get(kid)
+        if entry is None:
+            return None
+        cert, expires_at = entry
+        if expires_at <= time.time():
+            del _local_certs[kid]
+            return None
+        _local_certs.move_to_end(kid)
+        return cert
+
+
+def _set_local_certs(certs: dict[str, str], expires_at: float) -> None:
+    with _local_lock:
+        for kid, cert in certs.items():
+            _local_certs[kid] = (cert, expires_at)
+            _local_certs.move_to_end(kid)
+        while len(_local_certs) > LOCAL_CACHE_SIZE:
+            _local_certs.popitem(last=False)
+
+
+def clear_local_certs() -> None:
+    with _local_lock:
+        _local_certs.clear()
+
+
+def _get_shared_certs(allow_stale: bool = False) -> dict[str, Any] | None:
+    payload = _get_cache().get(CERTS_CACHE_KEY)
+    if payload and (allow_stale or payload["expires_at"] > time.time()):
+        return payload
+    return None
+
+
+def _fetch_certs() -> dict[str, Any] | None:
+    """Fetch Google signing certificates and save them on the Django cache.
+
+    :return: The certificates payload, or None if Google could not be reached.
+    """
+    logger.debug(f"Fetching Google certificates from {GOOGLE_CERTS_URL}")
+    try:
+        response = get_http_session().get(GOOGLE_CERTS_URL)
+        response.raise_for_status()
+        certs = response.json()
+    except requests.RequestException as error:
+        logger.warning(f"Error while fetching Google certificates: {error}")
+        return None
+    max_age = _get_max_age(response.headers.get("Cache-Control", ""))
+    now = time.time()
+    payload = {
+        "certs": certs,
+        "expires_at": now + max_age,
+        "fetched_at": now,
+    }
+    _get_cache().set(CERTS_CACHE_KEY, payload, timeout=max_age + CERTS_STALE_MAX_AGE)
+    return payload
+
+
+def _wait_for_refresh(kid: str, fetched_at: float) -> dict[str, Any] | None:
+    """Wait for another worker to refresh the certificates."""
+    deadline = time.monotonic() + CERTS_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(CERTS_LOCK_POLL_INTERVAL)
+        payload = _get_shared_certs()
+        if payload and (kid in payload["certs"] or payload["fetched_at"] > fetched_at):
+            return payload
+    return None
+
+
+def _refresh_certs(kid: str, payload: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Refresh the certificates once across all threads and workers.
+
+    Threads in the same process wait on a lock, and workers wait for the one
+    which holds the lock on the Django cache, reusing their result.
+    A recent refresh is not repeated for an unknown key id, and if Google
+    can't be reached, the last certificates are used, even if expired.
+    """
+    fetched_at = payload["fetched_at"] if payload else 0
+    if time.time() - fetched_at < CERTS_MIN_REFRESH_INTERVAL:
+        logger.debug(f"Google certificates were refreshed recently. Unknown kid: {kid}")
+        return payload
+
+    with _refresh_lock:
+        # Another thread could have refreshed the certificates
+        current = _get_shared_certs()
+        if current and (kid in current["certs"] or current["fetched_at"] > fetched_at):
+            return current
+
+        cache = _get_cache()
+        if cache.add(CERTS_LOCK_KEY, True, timeout=CERTS_LOCK_TIMEOUT):
+            try:
+                refreshed = _fetch_certs()
+            finally:
+                cache.delete(CERTS_LOCK_KEY)
+        else:
+            logger.debug("Waiting for another worker to refresh Google certificates.")
+            refreshed = _wait_for_refresh(kid, fetched_at) or _fetch_certs()
+
+    if refreshed is None:
+        return payload or _get_shared_certs(allow_stale=True)
+    return refreshed
+
+
+def get_cert(kid: str) -> str | None:
+    """Get the Google certificate for the key id.
+
+    Certificates are read from an in-process LRU, then from the Django cache,
+    and only then from Google, respecting their Cache-Control max-age.
+    """
+    cert = _get_local_cert(kid)
+    if cert:
+        return cert
+
+    payload = _get_shared_certs()
+    if not payload or kid not in payload["certs"]:
+        payload = _refresh_certs(kid, payload)
+    if not payload or kid not in payload["certs"]:
+        return None
+
+    _set_local_certs(payload["certs"], payload["expires_at"])
+    return payload["certs"][kid]
+
+
+def _get_key_id(token: str) -> str | None:
+    header_segment = token.split(".")[0]
+    padding = "=" * (-len(header_segment) % 4)
+    try:
+        header = json.loads(base64.urlsafe_b64decode(header_segment + padding))
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Invalid ID Token header: {error}") from error
+    return header.get("kid")
+
+
+def verify_id_token(
+    token: str, audience: str, clock_skew_in_seconds: int = 0
+) -> dict[str, Any]:
+    """Verify a Google ID Token using the cached certificates.
+
+    :raises ValueError: If the token is invalid.
+    :raises GoogleAuthError: If the issuer is not Google.
+    """
+    kid = _get_key_id(token)
+    cert = get_cert(kid) if kid else None
+    if not cert:
+        raise ValueError(f"Certificate for key id {kid} not found.")
+    claims = jwt.decode(
+        token,
+        certs={kid: cert},
+        audience=audience,
+        clock_skew_in_seconds=clock_skew_in_seconds,
+    )
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        raise GoogleAuthError(f"Wrong issuer. 'iss' should be one of {GOOGLE_ISSUERS}.")
+    return claims
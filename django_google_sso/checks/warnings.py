@@ -7,6 +7,7 @@ NON_SHARED_CACHE_BACKENDS = {
     "django.core.cache.backends.locmem.LocMemCache",
     "django.core.cache.backends.dummy.DummyCache",
 }
+CACHE_STATE_STORE = "django_google_sso.states.CacheStateStore"
 
 
 @register(Tags.templates)
@@ -119,3 +120,97 @@ def check_secure_callback_cache(app_configs, **kwargs):
             )
         ]
     return []
+
+
+@register()
+def check_state_store_cache(app_configs, **kwargs):
+    """Validate the cache used by the Google SSO cache state store."""
+    del app_configs, kwargs
+    from django_google_sso import conf
+
+    if conf.GOOGLE_SSO_STATE_STORE != CACHE_STATE_STORE:
+        return []
+
+    if not settings.is_overridden("CACHES"):
+        return [
+            Error(
+                msg=(
+                    "GOOGLE_SSO_STATE_STORE=CacheStateStore requires explicit "
+                    "Django CACHES configuration."
+                ),
+                hint=(
+                    "Configure the CACHES setting, or use another GOOGLE_SSO_STATE_STORE."
+                ),
+                id="sso.E004",
+            )
+        ]
+
+    cache_alias = conf.GOOGLE_SSO_CACHE_ALIAS
+    backend = (
+        settings.CACHES.get(cache_alias, {}).get("BACKEND")
+        if isinstance(settings.CACHES, dict)
+        else None
+    )
+    if backend in NON_SHARED_CACHE_BACKENDS:
+        return [
+            Warning(
+                msg=(
+                    "GOOGLE_SSO_STATE_STORE=CacheStateStore is using a non-shared "
+                    f"cache backend ({cache_alias}) for OAuth flow state."
+                ),
+                hint=(
+                    "Use a shared backend (for example Redis or database cache) in "
+                    "multi-worker environments, or silence this warning with "
+                    "SILENCED_SYSTEM_CHECKS = ['sso.W004']."
+                ),
+                id="sso.W004",
+            )
+        ]
+    return []
+
+
+@register()
+def check_import_paths(app_configs, **kwargs):
+    """Check the dotted paths for Google SSO hooks, backend and classes."""
+    del app_configs, kwargs
+    from django_google_sso.registry import build_registry
+
+    return [
+        Error(
+            msg=f"{setting} cannot be imported: {error}",
+            hint=f"Check the dotted path defined in {setting}.",
+            id="sso.E002",
+        )
+        for setting, error in build_registry().items()
+    ]
+
+
+@register(Tags.caches, deploy=True)
+def check_callback_cache(app_configs, **kwargs):
+    """Check the cache used to run the callback once for each code."""
+    del app_configs, kwargs
+    from django_google_sso import conf
+
+    cache_alias = conf.GOOGLE_SSO_CACHE_ALIAS
+    backend = (
+        settings.CACHES.get(cache_alias, {}).get("BACKEND")
+        if isinstance(settings.CACHES, dict)
+        else None
+    )
+    if backend in NON_SHARED_CACHE_BACKENDS:
+        return [
+            Warning(
+                msg=(
+                    "GOOGLE_SSO_CACHE_ALIAS is using a non-shared cache backend "
+                    f"({cache_alias}), so duplicate callbacks are only detected "
+                    "inside the same worker."
+                ),
+                hint=(
+                    "Use a shared backend (for example Redis or database cache) in "
+                    "multi-worker environments, or silence this warning with "
+                    "SILENCED_SYSTEM_CHECKS = ['sso.W005']."
+                ),
+                id="sso.W005",
+            )
+        ]
+    return []
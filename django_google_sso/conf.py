@@ -1,6 +1,7 @@
 from typing import Any, Callable, List
 
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.http import HttpRequest
 from loguru import logger
 
@@ -12,8 +13,37 @@ class GoogleSSOSettings:
     This class implements the PEP 562 approach to avoid accessing Django settings
     at import time, which can cause issues if the module is imported before
     Django has fully initialized its settings.
+
+    Values read from Django settings are kept in a snapshot, so each setting
+    is read only once. The snapshot is cleared when Django sends the
+    `setting_changed` signal (i.e. on `override_settings` in tests).
+    Callable values are stored as is and called later, for each request.
     """
 
+    def __init__(self) -> None:
+        self._snapshot: dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        """Get a setting value from the snapshot, reading it on first access."""
+        try:
+            return self._snapshot[name]
+        except KeyError:
+            pass
+        value = getattr(self, name)
+        self._snapshot[name] = value
+        return value
+
+    def clear(self) -> None:
+        """Clear the snapshot. Values will be read again on next access."""
+        self._snapshot.clear()
+
+    def apply_logs(self) -> None:
+        """Enable or disable the package logs, using GOOGLE_SSO_ENABLE_LOGS."""
+        if self.get("GOOGLE_SSO_ENABLE_LOGS"):
+            logger.enable("django_google_sso")
+        else:
+            logger.disable("django_google_sso")
+
     def _get_setting(
         self, name: str, default: Any = None, accept_callable: bool = True
     ) -> Any:
@@ -30,12 +60,61 @@ class GoogleSSOSettings:
 
     @property
     def GOOGLE_SSO_ENABLE_LOGS(self) -> bool:
-        value = self._get_setting("GOOGLE_SSO_ENABLE_LOGS", True, accept_callable=False)
-        if value:
-            logger.enable("django_google_sso")
-        else:
-            logger.disable("django_google_sso")
-        return value
+        return self._get_setting("GOOGLE_SSO_ENABLE_LOGS", True, accept_callable=False)
+
+    @property
+    def GOOGLE_SSO_USE_ASYNC_VIEWS(self) -> bool | None:
+        return self._get_setting("GOOGLE_SSO_USE_ASYNC_VIEWS", None, accept_callable=False)
+
+    @property
+    def GOOGLE_SSO_HTTP_POOL_CONNECTIONS(self) -> int:
+        return self._get_setting(
+            "GOOGLE_SSO_HTTP_POOL_CONNECTIONS", 10, accept_callable=False
+        )
+
+    @property
+    def GOOGLE_SSO_HTTP_POOL_MAXSIZE(self) -> int:
+        return self._get_setting("GOOGLE_SSO_HTTP_POOL_MAXSIZE", 10, accept_callable=False)
+
+    @property
+    def GOOGLE_SSO_HTTP_TIMEOUT(self) -> float:
+        return self._get_setting("GOOGLE_SSO_HTTP_TIMEOUT", 10, accept_callable=False)
+
+    @property
+    def GOOGLE_SSO_CACHE_ALIAS(self) -> str:
+        return self._get_setting("GOOGLE_SSO_CACHE_ALIAS", "default", accept_callable=False)
+
+    @property
+    def GOOGLE_SSO_QUERY_BUDGET_MODE(self) -> str | None:
+        return self._get_setting(
+            "GOOGLE_SSO_QUERY_BUDGET_MODE", None, accept_callable=False
+        )
+
+    @property
+    def GOOGLE_SSO_QUERY_BUDGET_EXTRA(self) -> int:
+        return self._get_setting("GOOGLE_SSO_QUERY_BUDGET_EXTRA", 0, accept_callable=False)
+
+    @property
+    def GOOGLE_SSO_DEFER_PROFILE_WRITES(self) -> bool:
+        return self._get_setting(
+            "GOOGLE_SSO_DEFER_PROFILE_WRITES", False, accept_callable=False
+        )
+
+    @property
+    def GOOGLE_SSO_WRITE_QUEUE(self) -> str:
+        return self._get_setting(
+            "GOOGLE_SSO_WRITE_QUEUE",
+            "django_google_sso.writes.LocalWriteQueue",
+            accept_callable=False,
+        )
+
+    @property
+    def GOOGLE_SSO_STATE_STORE(self) -> str:
+        return self._get_setting(
+            "GOOGLE_SSO_STATE_STORE",
+            "django_google_sso.states.SessionStateStore",
+            accept_callable=False,
+        )
 
     @property
     def SSO_USE_ALTERNATE_W003(self) -> bool:
@@ -163,6 +242,10 @@ class GoogleSSOSettings:
     def GOOGLE_SSO_SAVE_ACCESS_TOKEN(self) -> bool | Callable[[HttpRequest], bool]:
         return self._get_setting("GOOGLE_SSO_SAVE_ACCESS_TOKEN", False)
 
+    @property
+    def GOOGLE_SSO_SAVE_CREDENTIALS(self) -> bool | Callable[[HttpRequest], bool]:
+        return self._get_setting("GOOGLE_SSO_SAVE_CREDENTIALS", False)
+
     @property
     def GOOGLE_SSO_ALWAYS_UPDATE_USER_DATA(
         self,
@@ -173,6 +256,10 @@ class GoogleSSOSettings:
     def GOOGLE_SSO_DEFAULT_LOCALE(self) -> str | Callable[[HttpRequest], str]:
         return self._get_setting("GOOGLE_SSO_DEFAULT_LOCALE", "en")
 
+    @property
+    def GOOGLE_SSO_VERIFY_ID_TOKEN(self) -> bool | Callable[[HttpRequest], bool]:
+        return self._get_setting("GOOGLE_SSO_VERIFY_ID_TOKEN", False)
+
     @property
     def GOOGLE_SSO_ENABLE_MESSAGES(self) -> bool | Callable[[HttpRequest], bool]:
         return self._get_setting("GOOGLE_SSO_ENABLE_MESSAGES", True)
@@ -225,13 +312,21 @@ def __getattr__(name: str) -> Any:
     This function is called when an attribute is not found in the module's
     global namespace. It delegates to the _google_sso_settings instance.
     """
-    return getattr(_google_sso_settings, name)
+    return _google_sso_settings.get(name)
+
+
+def _reset_settings_snapshot(*, setting: str, **kwargs) -> None:
+    """Clear the settings snapshot when a SSO setting is changed."""
+    if not setting.startswith(("GOOGLE_SSO_", "SSO_")):
+        return
+    _google_sso_settings.clear()
+    if setting == "GOOGLE_SSO_ENABLE_LOGS":
+        _google_sso_settings.apply_logs()
+
 
+setting_changed.connect(_reset_settings_snapshot)
 
-if _google_sso_settings.SSO_USE_ALTERNATE_W003:
+if _google_sso_settings.get("SSO_USE_ALTERNATE_W003"):
     from django_google_sso.checks.warnings import register_sso_check  # noqa
 
-if _google_sso_settings.GOOGLE_SSO_ENABLE_LOGS:
-    logger.enable("django_google_sso")
-else:
-    logger.disable("django_google_sso")
+_google_sso_settings.apply_logs()
@@ -0,0 +1,148 @@
+import time
+from datetime import UTC, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest
+from django.utils import timezone
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from loguru import logger
+
+from django_google_sso import conf
+from django_google_sso.main import GoogleAuth
+from django_google_sso.models import GoogleSSOCredentials
+from django_google_sso.transport import get_http_session
+
+CREDENTIALS_LOCK_KEY = "django_google_sso:credentials:{user_id}:lock"
+CREDENTIALS_REFRESH_MARGIN = 300  # seconds before expiry
+CREDENTIALS_LOCK_TIMEOUT = 30  # seconds
+CREDENTIALS_WAIT_TIMEOUT = 10  # seconds
+CREDENTIALS_WAIT_INTERVAL = 0.1  # seconds
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+
+def _to_db_expiry(expiry: datetime | None) -> datetime | None:
+    """Convert the Google expiry, a naive datetime in UTC, to the Django format.
+
+    It is aware when USE_TZ is on, and naive in the current time zone otherwise.
+    """
+    if expiry is None:
+        return None
+    if timezone.is_naive(expiry):
+        expiry = expiry.replace(tzinfo=UTC)
+    if settings.USE_TZ:
+        return expiry
+    return timezone.make_naive(expiry)
+
+
+def _to_google_expiry(expiry: datetime | None) -> datetime | None:
+    if expiry is None:
+        return None
+    if timezone.is_naive(expiry):
+        expiry = timezone.make_aware(expiry)
+    return expiry.astimezone(UTC).replace(tzinfo=None)
+
+
+def save_credentials(user, credentials: Credentials) -> GoogleSSOCredentials:
+    """Save the Google credentials for the user.
+
+    Google only sends the refresh token on the first consent, so the saved
+    refresh token is kept when the new credentials don't have one.
+    """
+    defaults = {
+        "token": credentials.token,
+        "expiry": _to_db_expiry(credentials.expiry),
+        "scopes": list(credentials.scopes or []),
+    }
+    if credentials.refresh_token:
+        defaults["refresh_token"] = credentials.refresh_token
+    saved_credentials, _ = GoogleSSOCredentials.objects.update_or_create(
+        user=user, defaults=defaults
+    )
+    return saved_credentials
+
+
+class CredentialsManager:
+    """Return valid Google credentials for a user, refreshing them when needed.
+
+    Credentials are refreshed CREDENTIALS_REFRESH_MARGIN seconds before they
+    expire. A cache lock per user makes concurrent requests wait for a single
+    refresh, instead of calling the Google token endpoint each.
+
+    :param request: The current request, used to read the client settings.
+    """
+
+    def __init__(self, request: HttpRequest):
+        self.request = request
+
+    @property
+    def cache(self):
+        return caches[conf.GOOGLE_SSO_CACHE_ALIAS]
+
+    def get_credentials(self, user) -> Credentials | None:
+        """Return the credentials for the user, or None if they were never saved."""
+        saved_credentials = self._load(user)
+        if saved_credentials is None:
+            return None
+        if not self.needs_refresh(saved_credentials):
+            return self._build(saved_credentials)
+        if not saved_credentials.refresh_token:
+            logger.debug(f"No refresh token saved for user {user.pk}.")
+            return self._build(saved_credentials)
+        return self._refresh(user, saved_credentials)
+
+    def needs_refresh(self, saved_credentials: GoogleSSOCredentials) -> bool:
+        if saved_credentials.expiry is None:
+            return False
+        margin = timedelta(seconds=CREDENTIALS_REFRESH_MARGIN)
+        return saved_credentials.expiry - margin <= timezone.now()
+
+    def _load(self, user) -> GoogleSSOCredentials | None:
+        return GoogleSSOCredentials.objects.filter(user=user).first()
+
+    def _build(self, saved_credentials: GoogleSSOCredentials) -> Credentials:
+        google = GoogleAuth(self.request)
+        return Credentials(
+            token=saved_credentials.token,
+            refresh_token=saved_credentials.refresh_token or None,
+            token_uri=GOOGLE_TOKEN_URI,
+            client_id=google.get_sso_value("client_id"),
+            client_secret=google.get_sso_value("client_secret"),
+            scopes=saved_credentials.scopes or None,
+            expiry=_to_google_expiry(saved_credentials.expiry),
+        )
+
+    def _refresh(self, user, saved_credentials: GoogleSSOCredentials) -> Credentials:
+        lock_key = CREDENTIALS_LOCK_KEY.format(user_id=user.pk)
+        if not self.cache.add(lock_key, True, CREDENTIALS_LOCK_TIMEOUT):
+            return self._wait_for_refresh(user, lock_key, saved_credentials)
+        try:
+            # Another process can have refreshed it before the lock was taken.
+            saved_credentials = self._load(user) or saved_credentials
+            if not self.needs_refresh(saved_credentials):
+                return self._build(saved_credentials)
+            credentials = self._build(saved_credentials)
+            logger.debug(f"Refreshing Google credentials for user {user.pk}.")
+            credentials.refresh(Request(session=get_http_session()))
+            save_credentials(user, credentials)
+            return credentials
+        finally:
+            self.cache.delete(lock_key)
+
+    def _wait_for_refresh(
+        self, user, lock_key: str, saved_credentials: GoogleSSOCredentials
+    ) -> Credentials:
+        """Wait for the refresh running in another request, and use its result."""
+        deadline = time.monotonic() + CREDENTIALS_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(CREDENTIALS_WAIT_INTERVAL)
+            if self.cache.get(lock_key) is None:
+                break
+        refreshed_credentials = self._load(user) or saved_credentials
+        return self._build(refreshed_credentials)
+
+
+def get_credentials(request: HttpRequest, user) -> Credentials | None:
+    """Return valid Google credentials for the user, refreshing them if needed."""
+    return CredentialsManager(request).get_credentials(user)
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponseRedirect
+from loguru import logger
+
+from django_google_sso import conf
+
+CALLBACK_KEY = "django_google_sso:callback:{digest}"
+CALLBACK_LOCK_TIMEOUT = 30  # seconds
+CALLBACK_RESULT_TIMEOUT = 600  # seconds
+CALLBACK_WAIT_TIMEOUT = 10  # seconds
+CALLBACK_WAIT_INTERVAL = 0.1  # seconds
+
+
+def logged_in_redirect(redirect_url: str) -> HttpResponseRedirect:
+    """Return the redirect for a successful login.
+
+    Only these responses are saved for the duplicates of the callback.
+    """
+    response = HttpResponseRedirect(redirect_url)
+    response.google_sso_logged_in = True
+    return response
+
+
+@dataclass
+class CallbackDedupe:
+    """Run a callback only once for each (state, code) pair.
+
+    The first request exchanges the code and saves its redirect url.
+    Concurrent duplicates wait for this url, using a cache lock, and late
+    duplicates from the authenticated browser are redirected to it.
+    The code itself is not saved, only a hash of the pair.
+
+    Only the url of a successful login is saved, and never overwritten, so a
+    failed replay, like a prefetch without cookies, can't replace it.
+    """
+
+    request: HttpRequest
+    key: str | None
+
+    @classmethod
+    def for_request(cls, request: HttpRequest) -> "CallbackDedupe":
+        state = request.GET.get("state")
+        code = request.GET.get("code")
+        if not state or not code:
+            return cls(request, None)
+        digest = hashlib.sha256(f"{state}:{code}".encode()).hexdigest()
+        return cls(request, CALLBACK_KEY.format(digest=digest))
+
+    @property
+    def cache(self):
+        return caches[conf.GOOGLE_SSO_CACHE_ALIAS]
+
+    @property
+    def result_key(self) -> str:
+        return f"{self.key}:result"
+
+    @property
+    def lock_key(self) -> str:
+        return f"{self.key}:lock"
+
+    def run(self, handler: Callable[[], HttpResponseRedirect]) -> HttpResponseRedirect:
+        if self.key is None:
+            return handler()
+
+        redirect_url = self.cache.get(self.result_key)
+        user = getattr(self.request, "user", None)
+        if redirect_url and user is not None and user.is_authenticated:
+            logger.debug("Callback already processed. Redirecting.")
+            return HttpResponseRedirect(redirect_url)
+
+        if not self.cache.add(self.lock_key, True, CALLBACK_LOCK_TIMEOUT):
+            redirect_url = self.wait_for_result()
+            if redirect_url:
+                logger.debug("Callback processed by another request. Redirecting.")
+                return HttpResponseRedirect(redirect_url)
+            return handler()
+
+        try:
+            response = handler()
+            if getattr(response, "google_sso_logged_in", False):
+                self.cache.add(self.result_key, response.url, CALLBACK_RESULT_TIMEOUT)
+            return response
+        finally:
+            self.cache.delete(self.lock_key)
+
+    async def arun(
+        self, handler: Callable[[], Awaitable[HttpResponseRedirect]]
+    ) -> HttpResponseRedirect:
+        """Async version of `run`."""
+        if self.key is None:
+            return await handler()
+
+        redirect_url = await self.cache.aget(self.result_key)
+        auser = getattr(self.request, "auser", None)
+        if redirect_url and auser is not None and (await auser()).is_authenticated:
+            logger.debug("Callback already processed. Redirecting.")
+            return HttpResponseRedirect(redirect_url)
+
+        if not await self.cache.aadd(self.lock_key, True, CALLBACK_LOCK_TIMEOUT):
+            redirect_url = await self.await_result()
+            if redirect_url:
+                logger.debug("Callback processed by another request. Redirecting.")
+                return HttpResponseRedirect(redirect_url)
+            return await handler()
+
+        try:
+            response = await handler()
+            if getattr(response, "google_sso_logged_in", False):
+                await self.cache.aadd(
+                    self.result_key, response.url, CALLBACK_RESULT_TIMEOUT
+                )
+            return response
+        finally:
+            await self.cache.adelete(self.lock_key)
+
+    def wait_for_result(self) -> str | None:
+        deadline = time.monotonic() + CALLBACK_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            redirect_url = self.cache.get(self.result_key)
+            if redirect_url or self.cache.get(self.lock_key) is None:
+                return redirect_url
+            time.sleep(CALLBACK_WAIT_INTERVAL)
+        return None
+
+    async def await_result(self) -> str | None:
+        deadline = time.monotonic() + CALLBACK_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            redirect_url = await self.cache.aget(self.result_key)
+            if redirect_url or await self.cache.aget(self.lock_key) is None:
+                return redirect_url
+            await asyncio.sleep(CALLBACK_WAIT_INTERVAL)
+        return None
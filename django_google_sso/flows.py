@@ -0,0 +1,91 @@
+import copy
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from google_auth_oauthlib.flow import Flow
+from loguru import logger
+
+from django_google_sso.transport import get_http_adapter
+
+FLOW_CACHE_SIZE = 64
+
+_flow_templates: OrderedDict[tuple, Flow] = OrderedDict()
+_flow_lock = threading.Lock()
+
+
+def _get_flow_key(
+    client_config: dict[str, Any], scopes: Iterable[str], redirect_uri: str
+) -> tuple:
+    web_config = client_config["web"]
+    return (
+        web_config["client_id"],
+        web_config["client_secret"],
+        web_config["project_id"],
+        redirect_uri,
+        tuple(scopes),
+    )
+
+
+def _clone_flow(template: Flow) -> Flow:
+    """Return a copy of the Flow template, which can hold per-request state.
+
+    Only mutable state (headers, cookies, hooks, the oauthlib client) is
+    copied. Client config and scopes are shared with the template.
+    """
+    template_session = template.oauth2session
+    # requests.Session pickles (and copies) only their own attributes,
+    # so the OAuth2Session attributes are copied by hand.
+    session = object.__new__(type(template_session))
+    session.__dict__.update(template_session.__dict__)
+    session.headers = template_session.headers.copy()
+    session.cookies = template_session.cookies.copy()
+    session.proxies = dict(template_session.proxies)
+    session.params = dict(template_session.params)
+    session.hooks = {event: list(hooks) for event, hooks in template_session.hooks.items()}
+    session.compliance_hook = {
+        name: set(hooks) for name, hooks in template_session.compliance_hook.items()
+    }
+    session.auto_refresh_kwargs = dict(template_session.auto_refresh_kwargs)
+    session.adapters = OrderedDict(template_session.adapters)
+    session.mount("https://", get_http_adapter())
+    session._client = copy.copy(template_session._client)
+    return Flow(
+        session,
+        template.client_type,
+        {template.client_type: template.client_config},
+        redirect_uri=template.redirect_uri,
+        autogenerate_code_verifier=template.autogenerate_code_verifier,
+    )
+
+
+def get_flow(
+    client_config: dict[str, Any], scopes: Iterable[str], redirect_uri: str
+) -> Flow:
+    """Return a new Flow for the client config, scopes and redirect uri.
+
+    Flow templates are kept in a bounded LRU, keyed by the client credentials,
+    so the client config validation and the OAuth2Session are not built again
+    on every login. Each call returns a clone, safe to use in a single request.
+    """
+    key = _get_flow_key(client_config, scopes, redirect_uri)
+    with _flow_lock:
+        template = _flow_templates.get(key)
+        if template is not None:
+            _flow_templates.move_to_end(key)
+    if template is None:
+        logger.debug(f"Creating Flow template for client {key[0]}")
+        template = Flow.from_client_config(
+            client_config, scopes=list(key[-1]), redirect_uri=redirect_uri
+        )
+        with _flow_lock:
+            _flow_templates[key] = template
+            while len(_flow_templates) > FLOW_CACHE_SIZE:
+                _flow_templates.popitem(last=False)
+    return _clone_flow(template)
+
+
+def clear_flow_templates() -> None:
+    with _flow_lock:
+        _flow_templates.clear()
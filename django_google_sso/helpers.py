@@ -1,8 +1,86 @@
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.signals import setting_changed
 from django.http import HttpRequest
-from django.urls import reverse
+from django.urls import get_resolver, get_script_prefix, get_urlconf, reverse
+from django.urls.resolvers import URLResolver
 
 from django_google_sso import conf
 
+ROUTE_CACHE_SIZE = 256
+SITE_CACHE_TIMEOUT = 300  # seconds
+SITE_CACHE_SIZE = 256
+SITE_SETTINGS = {"SITE_ID", "INSTALLED_APPS", "ALLOWED_HOSTS"}
+
+_site_domains: dict[tuple, tuple[str, float]] = {}
+_site_lock = threading.Lock()
+
+
+@lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def _reverse_route(resolver: URLResolver, script_prefix: str, route: str) -> str:
+    return reverse(route, urlconf=resolver.urlconf_name)
+
+
+def reverse_route(route: str) -> str:
+    """Reverse a route name without arguments, like `admin:index`.
+
+    Results are cached by URLconf and script prefix. A new resolver is
+    created when the URL caches are cleared (i.e. when ROOT_URLCONF
+    changes), so old results are not used anymore.
+
+    :raises NoReverseMatch: If the route cannot be reversed.
+    """
+    return _reverse_route(get_resolver(get_urlconf()), get_script_prefix(), route)
+
+
+def clear_route_cache(*, setting: str | None = None, **kwargs) -> None:
+    if setting is None or setting == "ROOT_URLCONF":
+        _reverse_route.cache_clear()
+
+
+setting_changed.connect(clear_route_cache)
+
+
+def get_site_domain(request: HttpRequest) -> str:
+    """Return the domain of the current Site, cached by host for some time.
+
+    The cache is cleared when a Site is saved or deleted.
+    """
+    site_id = getattr(settings, "SITE_ID", None)
+    key = (site_id, None if site_id else request.get_host())
+    now = time.monotonic()
+    cached = _site_domains.get(key)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    domain = get_current_site(request).domain
+    with _site_lock:
+        if len(_site_domains) >= SITE_CACHE_SIZE:
+            _site_domains.clear()
+        _site_domains[key] = (domain, now + SITE_CACHE_TIMEOUT)
+    return domain
+
+
+def clear_site_cache(*, setting: str | None = None, **kwargs) -> None:
+    if setting is not None and setting not in SITE_SETTINGS:
+        return
+    with _site_lock:
+        _site_domains.clear()
+
+
+setting_changed.connect(clear_site_cache)
+
+
+def get_admin_prefix(request: HttpRequest) -> str:
+    """Return the path prefix of the admin interface, from SSO_ADMIN_ROUTE."""
+    admin_route = conf.SSO_ADMIN_ROUTE
+    if callable(admin_route):
+        admin_route = admin_route(request)
+    return reverse_route(admin_route)
+
 
 def is_admin_path(request: HttpRequest) -> bool:
     """Check if the request path is for the admin interface.
@@ -13,15 +91,27 @@ def is_admin_path(request: HttpRequest) -> bool:
     the admin interface.
 
     """
-    admin_route = conf.SSO_ADMIN_ROUTE
-    if callable(admin_route):
-        admin_route = admin_route(request)
+    admin_prefix = get_admin_prefix(request)
     return (
-        request.path.startswith(reverse(admin_route))
-        or request.GET.get("next", "").startswith(reverse(admin_route))
-        or request.session.get("sso_next_url", "").startswith(reverse(admin_route))
+        request.path.startswith(admin_prefix)
+        or request.GET.get("next", "").startswith(admin_prefix)
+        or request.session.get("sso_next_url", "").startswith(admin_prefix)
     )
 
 
 def is_page_path(request: HttpRequest) -> bool:
     return not is_admin_path(request)
+
+
+def use_async_views() -> bool:
+    """Check if the async versions of the SSO views must be used.
+
+    When GOOGLE_SSO_USE_ASYNC_VIEWS is not defined, the async views are used
+    if the project defines an ASGI_APPLICATION. Only Django Channels uses this
+    setting: other ASGI servers must set GOOGLE_SSO_USE_ASYNC_VIEWS.
+
+    """
+    use_async = conf.GOOGLE_SSO_USE_ASYNC_VIEWS
+    if use_async is None:
+        use_async = bool(getattr(settings, "ASGI_APPLICATION", None))
+    return use_async
@@ -6,6 +6,8 @@ from django_google_sso.models import User
 def pre_login_user(user: User, request: HttpRequest) -> None:
     """
     Callback function called after user is created/retrieved but before logged in.
+
+    All callbacks in this module can also be defined as coroutine functions.
     """
 
 
@@ -1,19 +1,105 @@
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Any, Optional
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
-from django.contrib.sites.shortcuts import get_current_site
-from django.db.models import Field
-from django.urls import reverse
+from django.core.cache import caches
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Case, Field, Q, QuerySet, Value, When
 from django.utils.translation import gettext_lazy as _
+from google.auth.exceptions import GoogleAuthError
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from loguru import logger
 
 from django_google_sso import conf
+from django_google_sso.certs import GOOGLE_CERTS_URL, verify_id_token
+from django_google_sso.flows import get_flow
+from django_google_sso.helpers import get_admin_prefix, get_site_domain, reverse_route
 from django_google_sso.models import GoogleSSOUser
+from django_google_sso.transport import get_async_http_client, get_http_session
+from django_google_sso.writes import (
+    DEFERRED_GOOGLE_SSO_USER_FIELDS,
+    DEFERRED_USER_FIELDS,
+    ProfileWrite,
+    get_write_queue,
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
+ID_TOKEN_CLOCK_SKEW = 10  # seconds
+SUPERUSER_CACHE_KEY = "django_google_sso:superuser:{domain}"
+SUPERUSER_CACHE_TIMEOUT = 3600  # seconds
+REQUIRED_ID_TOKEN_CLAIMS = ("sub", "email", "email_verified")
+
+# ID Token claim -> Google User Info (v2) field
+ID_TOKEN_USER_INFO_FIELDS = {
+    "sub": "id",
+    "email": "email",
+    "email_verified": "verified_email",
+    "name": "name",
+    "given_name": "given_name",
+    "family_name": "family_name",
+    "picture": "picture",
+    "locale": "locale",
+    "hd": "hd",
+}
+
+
+@dataclass
+class RequestSSOSettings:
+    """SSO settings resolved for a single request.
+
+    Callable settings are called at most once per request. The result is reused
+    while the setting is not changed, by all GoogleAuth and UserHelper instances
+    created for the same request.
+    """
+
+    request: Any
+    values: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+    callable_calls: int = 0
+
+    @classmethod
+    def for_request(cls, request: Any) -> "RequestSSOSettings":
+        sso_settings = getattr(request, "_google_sso_settings", None)
+        if sso_settings is None:
+            sso_settings = cls(request)
+            try:
+                request._google_sso_settings = sso_settings
+            except AttributeError:
+                logger.debug("Cannot save resolved SSO settings on request.")
+        return sso_settings
+
+    def get(self, key: str) -> Any:
+        google_sso_conf = f"GOOGLE_SSO_{key.upper()}"
+        if not hasattr(conf, google_sso_conf):
+            raise ValueError(
+                f"SSO Configuration '{google_sso_conf}' not found in settings."
+            )
+        value = getattr(conf, google_sso_conf)
+        cached = self.values.get(google_sso_conf)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        resolved_value = value
+        if callable(value):
+            logger.debug(f"Value from conf {google_sso_conf} is a callable. Calling it.")
+            self.callable_calls += 1
+            resolved_value = value(self.request)
+        self.values[google_sso_conf] = (value, resolved_value)
+        return resolved_value
+
+    def resolve(self, keys: Iterable[str]) -> None:
+        """Resolve all keys at once, like before running async code."""
+        for key in keys:
+            self.get(key)
 
 
 @dataclass
@@ -21,6 +107,10 @@ class GoogleAuth:
     request: Any
     _flow: Optional[Flow] = None
 
+    @property
+    def sso_settings(self) -> RequestSSOSettings:
+        return RequestSSOSettings.for_request(self.request)
+
     @property
     def scopes(self) -> list[str]:
         return self.get_sso_value("scopes")
@@ -46,18 +136,11 @@ class GoogleAuth:
 
         :param key: The key to retrieve from the settings.
         :return: The value associated with the key.
+        Callable values are called only once per request.
+
         :raises ValueError: If the key is not found in the settings.
         """
-        google_sso_conf = f"GOOGLE_SSO_{key.upper()}"
-        if hasattr(conf, google_sso_conf):
-            value = getattr(conf, google_sso_conf)
-            if callable(value):
-                logger.debug(
-                    f"Value from conf {google_sso_conf} is a callable. Calling it."
-                )
-                return value(self.request)
-            return value
-        raise ValueError(f"SSO Configuration '{google_sso_conf}' not found in settings.")
+        return self.sso_settings.get(key)
 
     def get_client_config(self) -> Credentials:
         client_config = {
@@ -66,9 +149,7 @@ class GoogleAuth:
                 "project_id": self.get_sso_value("project_id"),
                 "client_secret": self.get_sso_value("client_secret"),
                 "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "auth_provider_x509_cert_url": (
-                    "https://www.googleapis.com/oauth2/v1/certs"
-                ),
+                "auth_provider_x509_cert_url": GOOGLE_CERTS_URL,
                 "token_uri": "https://oauth2.googleapis.com/token",
                 "redirect_uris": [self.get_redirect_uri()],
             }
@@ -81,9 +162,8 @@ class GoogleAuth:
             logger.debug("Find Netloc using GOOGLE_SSO_CALLBACK_DOMAIN")
             return callback_domain
 
-        site = get_current_site(self.request)
         logger.debug("Find Netloc using Site domain")
-        return site.domain
+        return get_site_domain(self.request)
 
     def get_redirect_uri(self) -> str:
         if "HTTP_X_FORWARDED_PROTO" in self.request.META:
@@ -94,7 +174,7 @@ class GoogleAuth:
         else:
             scheme = self.request.scheme
         netloc = self.get_netloc()
-        path = reverse("django_google_sso:oauth_callback")
+        path = reverse_route("django_google_sso:oauth_callback")
         callback_uri = f"{scheme}://{netloc}{path}"
         logger.debug(f"Callback URI: {callback_uri}")
         return callback_uri
@@ -102,18 +182,107 @@ class GoogleAuth:
     @property
     def flow(self) -> Flow:
         if not self._flow:
-            self._flow = Flow.from_client_config(
+            self._flow = get_flow(
                 self.get_client_config(),
                 scopes=self.scopes,
                 redirect_uri=self.get_redirect_uri(),
             )
         return self._flow
 
+    def get_user_info_from_id_token(self) -> dict | None:
+        """Get the user info from the ID Token received with the access token.
+
+        The ID Token signature is verified locally, and their claims are
+        converted to the same format returned by the Google User Info API.
+
+        :return: The user info dict, or None if the ID Token is missing,
+            invalid or does not have the required claims.
+        """
+        token = (self.flow.oauth2session.token or {}).get("id_token")
+        if not token:
+            logger.debug("ID Token not received from Google.")
+            return None
+        try:
+            claims = verify_id_token(
+                token,
+                audience=self.flow.client_config["client_id"],
+                clock_skew_in_seconds=ID_TOKEN_CLOCK_SKEW,
+            )
+        except (ValueError, GoogleAuthError) as error:
+            logger.warning(f"Error while verifying ID Token: {error}")
+            return None
+        missing_claims = [key for key in REQUIRED_ID_TOKEN_CLAIMS if key not in claims]
+        if missing_claims:
+            logger.debug(f"ID Token missing required claims: {missing_claims}")
+            return None
+        return {
+            field: claims[claim]
+            for claim, field in ID_TOKEN_USER_INFO_FIELDS.items()
+            if claim in claims
+        }
+
     def get_user_info(self):
-        session = self.flow.authorized_session()
-        user_info = session.get("https://www.googleapis.com/oauth2/v2/userinfo").json()
+        if self.get_sso_value("verify_id_token"):
+            user_info = self.get_user_info_from_id_token()
+            if user_info:
+                return user_info
+            logger.debug("Falling back to Google User Info API.")
+        return self.request_user_info()
+
+    def request_user_info(self) -> dict:
+        headers = {"Authorization": f"Bearer {self.get_user_token()}"}
+        user_info = get_http_session().get(GOOGLE_USERINFO_URL, headers=headers).json()
         return user_info
 
+    async def afetch_token(self, code: str) -> dict:
+        """Exchange the authorization code for a token without blocking the loop.
+
+        The token request is built and parsed by the same oauthlib client used
+        in `flow.fetch_token`, but the HTTP call is awaited using httpx.
+        If httpx is not installed, the sync version runs in a thread.
+
+        :param code: The authorization code received from Google.
+        :return: The token received from Google.
+        """
+        flow = await sync_to_async(getattr)(self, "flow")
+        if httpx is None:
+            logger.debug("httpx not installed. Fetching token in a thread.")
+            return await sync_to_async(flow.fetch_token)(code=code)
+
+        oauth2session = flow.oauth2session
+        body = oauth2session._client.prepare_request_body(
+            code=code,
+            redirect_uri=oauth2session.redirect_uri,
+            include_client_id=True,
+            client_secret=flow.client_config["client_secret"],
+            code_verifier=flow.code_verifier,
+        )
+        response = await get_async_http_client().post(
+            flow.client_config["token_uri"],
+            content=body,
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+        )
+        oauth2session._client.parse_request_body_response(
+            response.text, scope=oauth2session.scope
+        )
+        oauth2session.token = oauth2session._client.token
+        return oauth2session.token
+
+    async def aget_user_info(self) -> dict:
+        if self.get_sso_value("verify_id_token"):
+            user_info = await sync_to_async(self.get_user_info_from_id_token)()
+            if user_info:
+                return user_info
+            logger.debug("Falling back to Google User Info API.")
+        if httpx is None:
+            return await sync_to_async(self.request_user_info)()
+        headers = {"Authorization": f"Bearer {self.get_user_token()}"}
+        response = await get_async_http_client().get(GOOGLE_USERINFO_URL, headers=headers)
+        return response.json()
+
     def get_user_token(self):
         return self.flow.credentials.token
 
@@ -122,16 +291,14 @@ class GoogleAuth:
         if not conf.GOOGLE_SSO_ENABLED:
             response = False, "Google SSO not enabled."
         else:
-            admin_route = conf.SSO_ADMIN_ROUTE
-            if callable(admin_route):
-                admin_route = admin_route(self.request)
+            is_admin_url = next_url.startswith(get_admin_prefix(self.request))
 
             admin_enabled = self.get_sso_value("admin_enabled")
-            if admin_enabled is False and next_url.startswith(reverse(admin_route)):
+            if admin_enabled is False and is_admin_url:
                 response = False, "Google SSO not enabled for Admin."
 
             pages_enabled = self.get_sso_value("pages_enabled")
-            if pages_enabled is False and not next_url.startswith(reverse(admin_route)):
+            if pages_enabled is False and not is_admin_url:
                 response = False, "Google SSO not enabled for Pages."
 
         if response[1]:
@@ -140,20 +307,93 @@ class GoogleAuth:
         return response
 
 
+def get_superuser_cache_key(domain: str) -> str:
+    return SUPERUSER_CACHE_KEY.format(domain=domain)
+
+
+def clear_superuser_cache(sender, instance, update_fields=None, **kwargs) -> None:
+    """Clear the cached superuser check for the saved or deleted user domain.
+
+    Saves which can't change the superuser flag or the email, like the
+    `last_login` update on each login, keep the cache.
+    """
+    email_field_name = instance.get_email_field_name()
+    checked_fields = {"is_superuser", email_field_name}
+    if update_fields is not None and not checked_fields.intersection(update_fields):
+        return
+    email = getattr(instance, email_field_name, None) or ""
+    if "@" in email:
+        cache = caches[conf.GOOGLE_SSO_CACHE_ALIAS]
+        cache.delete(get_superuser_cache_key(email.split("@")[-1].lower()))
+
+
+def get_sso_user_email_fields(user) -> dict[str, str]:
+    """Return the user email, lower-cased, for the GoogleSSOUser lookup columns."""
+    email = (getattr(user, user.get_email_field_name(), None) or "").lower()
+    return {"email": email, "email_domain": email.split("@")[-1] if "@" in email else ""}
+
+
+def sync_sso_user_email(
+    sender, instance, created=False, update_fields=None, **kwargs
+) -> None:
+    """Keep the GoogleSSOUser email columns equal to the user email.
+
+    Users are found by these columns on login, so they can't keep an email
+    which was changed on the user, like by an admin. Saves which can't change
+    the email, like the `last_login` update on each login, are skipped.
+    """
+    if created:
+        return
+    if update_fields is not None and instance.get_email_field_name() not in update_fields:
+        return
+    email_fields = get_sso_user_email_fields(instance)
+    GoogleSSOUser.objects.filter(user=instance).exclude(**email_fields).update(
+        **email_fields
+    )
+
+
 @dataclass
 class UserHelper:
     user_info: dict[Any, Any]
     request: Any
     user_changed: bool = False
+    user_created: bool = False
+    update_fields: set[str] = field(default_factory=set)
+    google_sso_user: GoogleSSOUser | None = None
+
+    @cached_property
+    def google(self) -> GoogleAuth:
+        return GoogleAuth(self.request)
 
     @property
     def user_info_email(self):
         return self.user_info["email"].lower()
 
+    @property
+    def user_info_domain(self) -> str:
+        return self.user_info_email.split("@")[-1]
+
+    @property
+    def login_path(self) -> str:
+        """Login path used for the query budget."""
+        if self.user_created:
+            return "new_user"
+        if self.google_sso_user is not None or not self.save_basic_google_info:
+            return "returning_user"
+        return "first_sso_login"
+
+    @property
+    def save_basic_google_info(self) -> bool:
+        return self.google.get_sso_value("save_basic_google_info")
+
     @property
     def user_model(self) -> type[User]:
         return get_user_model()
 
+    @cached_property
+    def user_field_names(self) -> set[str]:
+        return {model_field.name for model_field in self.user_model._meta.concrete_fields}
+
     @property
     def username_field(self) -> Field:
         return self.user_model._meta.get_field(self.user_model.USERNAME_FIELD)
@@ -164,9 +404,8 @@ class UserHelper:
 
     @property
     def email_is_valid(self) -> bool:
-        google = GoogleAuth(self.request)
-        user_email_domain = self.user_info_email.split("@")[-1]
-        allowable_domains = google.get_sso_value("allowable_domains")
+        user_email_domain = self.user_info_domain
+        allowable_domains = self.google.get_sso_value("allowable_domains")
         if "*" in allowable_domains or user_email_domain in allowable_domains:
             return True
         email_verified = self.user_info.get("email_verified", None)
@@ -174,78 +413,286 @@ class UserHelper:
             logger.debug(f"Email {self.user_info_email} is not verified.")
         return email_verified if email_verified is not None else False
 
+    def get_user_defaults(self, extra_users_args: dict | None = None) -> dict:
+        user_defaults = extra_users_args or {}
+        if self.username_field.name not in user_defaults:
+            user_defaults[self.username_field.name] = self.user_info_email
+        if self.email_field_name not in user_defaults:
+            user_defaults[self.email_field_name] = self.user_info_email
+        return user_defaults
+
+    def get_google_sso_user_defaults(self, user) -> dict:
+        default_locale = self.google.get_sso_value("default_locale")
+        return {
+            "google_id": self.user_info["id"],
+            **get_sso_user_email_fields(user),
+            "picture_url": self.user_info.get("picture"),
+            "locale": self.user_info.get("locale") or default_locale,
+        }
+
     def get_or_create_user(self, extra_users_args: dict | None = None):
-        google = GoogleAuth(self.request)
 
-        if extra_users_args and google.get_sso_value("pre_create_user_return_full_args"):
+        if extra_users_args and self.google.get_sso_value(
+            "pre_create_user_return_full_args"
+        ):
             user, created = self.user_model.objects.get_or_create(**extra_users_args)
         else:
-            user_defaults = extra_users_args or {}
-            if self.username_field.name not in user_defaults:
-                user_defaults[self.username_field.name] = self.user_info_email
-            if self.email_field_name not in user_defaults:
-                user_defaults[self.email_field_name] = self.user_info_email
-            user, created = self.user_model.objects.get_or_create(
-                **{f"{self.email_field_name}__iexact": self.user_info_email},
-                defaults=user_defaults,
-            )
+            user = self.find_sso_user() or self.find_user_by_email()
+            created = user is None
+            if created:
+                user = self.user_model(**self.get_user_defaults(extra_users_args))
         self.check_first_super_user(user)
         self.check_for_update(created, user)
-        if self.user_changed:
-            user.save()
-
-        save_basic_info = google.get_sso_value("save_basic_google_info")
-        if save_basic_info:
-            default_locale = google.get_sso_value("default_locale")
-            GoogleSSOUser.objects.update_or_create(
-                user=user,
-                defaults={
-                    "google_id": self.user_info["id"],
-                    "picture_url": self.user_info.get("picture"),
-                    "locale": self.user_info.get("locale") or default_locale,
-                },
-            )
+        if user._state.adding:
+            user, created = self.insert_user(user)
+        else:
+            self.defer_profile_writes(user, self.update_fields)
+            if self.update_fields:
+                user.save(update_fields=self.update_fields)
+
+        self.save_google_sso_user(user, created)
+        self.user_created = created
+        return user
+
+    async def aget_or_create_user(self, extra_users_args: dict | None = None):
+
+        if extra_users_args and self.google.get_sso_value(
+            "pre_create_user_return_full_args"
+        ):
+            user, created = await self.user_model.objects.aget_or_create(**extra_users_args)
+        else:
+            user = await self.afind_sso_user() or await self.afind_user_by_email()
+            created = user is None
+            if created:
+                user = self.user_model(**self.get_user_defaults(extra_users_args))
+        await self.acheck_first_super_user(user)
+        self.check_for_update(created, user)
+        if user._state.adding:
+            user, created = await self.ainsert_user(user)
+        else:
+            self.defer_profile_writes(user, self.update_fields)
+            if self.update_fields:
+                await user.asave(update_fields=self.update_fields)
+
+        await self.asave_google_sso_user(user, created)
+        self.user_created = created
         return user
 
+    def insert_user(self, user) -> tuple[Any, bool]:
+        """Insert the new user with a single query.
+
+        If the same user was created concurrently, return the saved user.
+        """
+        try:
+            with transaction.atomic(using=router.db_for_write(self.user_model)):
+                user.save(force_insert=True)
+        except IntegrityError:
+            saved_user = self.find_user_by_email()
+            if saved_user is None:
+                raise
+            return saved_user, False
+        return user, True
+
+    async def ainsert_user(self, user) -> tuple[Any, bool]:
+        """Async version of `insert_user`.
+
+        Django does not run async views inside a transaction, so the INSERT
+        does not need a savepoint to recover from a concurrent creation.
+        """
+        try:
+            await user.asave(force_insert=True)
+        except IntegrityError:
+            saved_user = await self.afind_user_by_email()
+            if saved_user is None:
+                raise
+            return saved_user, False
+        return user, True
+
+    def save_google_sso_user(self, user, created: bool) -> None:
+        """Save the basic Google info for the user.
+
+        New users get an INSERT. For users found by `find_sso_user`, only the
+        changed fields are updated, if any. Otherwise, the row is upserted.
+        """
+        if not self.save_basic_google_info:
+            return
+        defaults = self.get_google_sso_user_defaults(user)
+        sso_user = self.google_sso_user
+        if created:
+            GoogleSSOUser.objects.create(user=user, **defaults)
+        elif sso_user is not None and sso_user.user_id == user.pk:
+            changed_fields = {
+                name for name, value in defaults.items() if getattr(sso_user, name) != value
+            }
+            for name in changed_fields:
+                setattr(sso_user, name, defaults[name])
+            self.defer_profile_writes(sso_user, changed_fields)
+            if changed_fields:
+                sso_user.save(update_fields=changed_fields)
+        else:
+            self.upsert_google_sso_user(user, defaults)
+
+    async def asave_google_sso_user(self, user, created: bool) -> None:
+        """Async version of `save_google_sso_user`."""
+        if not self.save_basic_google_info:
+            return
+        defaults = self.get_google_sso_user_defaults(user)
+        sso_user = self.google_sso_user
+        if created:
+            await GoogleSSOUser.objects.acreate(user=user, **defaults)
+        elif sso_user is not None and sso_user.user_id == user.pk:
+            changed_fields = {
+                name for name, value in defaults.items() if getattr(sso_user, name) != value
+            }
+            for name in changed_fields:
+                setattr(sso_user, name, defaults[name])
+            self.defer_profile_writes(sso_user, changed_fields)
+            if changed_fields:
+                await sso_user.asave(update_fields=changed_fields)
+        else:
+            await self.aupsert_google_sso_user(user, defaults)
+
+    def defer_profile_writes(self, instance, update_fields: set[str]) -> None:
+        """Move the profile fields out of `update_fields`, into the write queue.
+
+        Only used for existing rows, when GOOGLE_SSO_DEFER_PROFILE_WRITES
+        is enabled. The instance must already hold the new values.
+        """
+        if not conf.GOOGLE_SSO_DEFER_PROFILE_WRITES:
+            return
+        if isinstance(instance, GoogleSSOUser):
+            deferred_fields = update_fields & DEFERRED_GOOGLE_SSO_USER_FIELDS
+        else:
+            deferred_fields = update_fields & DEFERRED_USER_FIELDS
+        if not deferred_fields:
+            return
+        update_fields -= deferred_fields
+        get_write_queue().put(
+            ProfileWrite(
+                model_label=instance._meta.label,
+                pk=instance.pk,
+                fields={name: getattr(instance, name) for name in deferred_fields},
+            )
+        )
+
+    def upsert_google_sso_user(self, user, defaults: dict) -> None:
+        """Insert or update the GoogleSSOUser row with a single query.
+
+        Uses `update_or_create` on databases without support for conflicts.
+        """
+        features = connections[router.db_for_write(GoogleSSOUser)].features
+        if not features.supports_update_conflicts:
+            GoogleSSOUser.objects.update_or_create(user=user, defaults=defaults)
+            return
+        GoogleSSOUser.objects.bulk_create(
+            [GoogleSSOUser(user=user, **defaults)],
+            update_conflicts=True,
+            unique_fields=(
+                ["user"] if features.supports_update_conflicts_with_target else None
+            ),
+            update_fields=list(defaults),
+        )
+
+    async def aupsert_google_sso_user(self, user, defaults: dict) -> None:
+        """Async version of `upsert_google_sso_user`."""
+        features = connections[router.db_for_write(GoogleSSOUser)].features
+        if not features.supports_update_conflicts:
+            await GoogleSSOUser.objects.aupdate_or_create(user=user, defaults=defaults)
+            return
+        await GoogleSSOUser.objects.abulk_create(
+            [GoogleSSOUser(user=user, **defaults)],
+            update_conflicts=True,
+            unique_fields=(
+                ["user"] if features.supports_update_conflicts_with_target else None
+            ),
+            update_fields=list(defaults),
+        )
+
     def check_for_update(self, created, user):
-        google = GoogleAuth(self.request)
-        always_update = google.get_sso_value("always_update_user_data")
+        always_update = self.google.get_sso_value("always_update_user_data")
         if created or always_update:
             self.check_for_permissions(user)
-            user.first_name = self.user_info.get("given_name")
-            user.last_name = self.user_info.get("family_name")
+            self.update_user_field(user, "first_name", self.user_info.get("given_name"))
+            self.update_user_field(user, "last_name", self.user_info.get("family_name"))
             if not getattr(user, self.username_field.name):
-                setattr(user, self.username_field.name, self.user_info_email)
-            user.set_unusable_password()
-            self.user_changed = True
+                self.update_user_field(user, self.username_field.name, self.user_info_email)
+            if user.has_usable_password():
+                user.set_unusable_password()
+                self.mark_user_changed("password")
+
+    def update_user_field(self, user, name: str, value: Any) -> None:
+        """Set the user field, only if the value is different."""
+        if getattr(user, name, None) == value:
+            return
+        setattr(user, name, value)
+        self.mark_user_changed(name)
+
+    def mark_user_changed(self, name: str) -> None:
+        self.user_changed = True
+        if name in self.user_field_names:
+            self.update_fields.add(name)
+
+    def superuser_query(self) -> QuerySet:
+        return self.user_model.objects.filter(
+            is_superuser=True,
+            **{f"{self.email_field_name}__icontains": f"@{self.user_info_domain}"},
+        )
+
+    def sso_superuser_query(self) -> QuerySet:
+        return GoogleSSOUser.objects.filter(
+            email_domain=self.user_info_domain, user__is_superuser=True
+        )
+
+    def superuser_exists(self) -> bool:
+        """Check if a superuser exists for the user email domain.
+
+        Users created by Google SSO are found using the indexed email domain.
+        The full query on the User table runs only when none is found, and
+        the result is cached until a user is saved or deleted.
+        """
+        cache = caches[conf.GOOGLE_SSO_CACHE_ALIAS]
+        cache_key = get_superuser_cache_key(self.user_info_domain)
+        exists = cache.get(cache_key)
+        if exists is None:
+            exists = self.sso_superuser_query().exists() or self.superuser_query().exists()
+            cache.set(cache_key, exists, SUPERUSER_CACHE_TIMEOUT)
+        return exists
+
+    async def asuperuser_exists(self) -> bool:
+        cache = caches[conf.GOOGLE_SSO_CACHE_ALIAS]
+        cache_key = get_superuser_cache_key(self.user_info_domain)
+        exists = await cache.aget(cache_key)
+        if exists is None:
+            exists = (
+                await self.sso_superuser_query().aexists()
+                or await self.superuser_query().aexists()
+            )
+            await cache.aset(cache_key, exists, SUPERUSER_CACHE_TIMEOUT)
+        return exists
+
+    def add_first_super_user(self, user):
+        message_text = _(
+            f"GOOGLE_SSO_AUTO_CREATE_FIRST_SUPERUSER is True. "
+            f"Adding SuperUser status to email: {self.user_info_email}"
+        )
+        messages.add_message(self.request, messages.INFO, message_text)
+        logger.warning(message_text)
+        self.update_user_field(user, "is_superuser", True)
+        self.update_user_field(user, "is_staff", True)
 
     def check_first_super_user(self, user):
-        google = GoogleAuth(self.request)
-        auto_create = google.get_sso_value("auto_create_first_superuser")
-        if auto_create:
-            superuser_exists = self.user_model.objects.filter(
-                is_superuser=True,
-                **{
-                    f"{self.email_field_name}__icontains": (
-                        f"@{self.user_info_email.split('@')[-1]}"
-                    )
-                },
-            ).exists()
-            if not superuser_exists:
-                message_text = _(
-                    f"GOOGLE_SSO_AUTO_CREATE_FIRST_SUPERUSER is True. "
-                    f"Adding SuperUser status to email: {self.user_info_email}"
-                )
-                messages.add_message(self.request, messages.INFO, message_text)
-                logger.warning(message_text)
-                user.is_superuser = True
-                user.is_staff = True
-                self.user_changed = True
+        auto_create = self.google.get_sso_value("auto_create_first_superuser")
+        if auto_create and not self.superuser_exists():
+            self.add_first_super_user(user)
+
+    async def acheck_first_super_user(self, user):
+        auto_create = self.google.get_sso_value("auto_create_first_superuser")
+        if auto_create and not await self.asuperuser_exists():
+            self.add_first_super_user(user)
 
     def check_for_permissions(self, user):
         user_email = getattr(user, self.email_field_name)
-        google = GoogleAuth(self.request)
-        staff_list = google.get_sso_value("staff_list")
+        staff_list = self.google.get_sso_value("staff_list")
         if user_email in staff_list or "*" in staff_list:
             message_text = _(
                 f"User email: {user_email} in GOOGLE_SSO_STAFF_LIST. "
@@ -253,8 +700,8 @@ class UserHelper:
             )
             messages.add_message(self.request, messages.INFO, message_text)
             logger.debug(message_text)
-            user.is_staff = True
-        superuser_list = google.get_sso_value("superuser_list")
+            self.update_user_field(user, "is_staff", True)
+        superuser_list = self.google.get_sso_value("superuser_list")
         if user_email in superuser_list:
             message_text = _(
                 f"User email: {user_email} in GOOGLE_SSO_SUPERUSER_LIST. "
@@ -262,11 +709,68 @@ class UserHelper:
             )
             messages.add_message(self.request, messages.INFO, message_text)
             logger.debug(message_text)
-            user.is_superuser = True
-            user.is_staff = True
+            self.update_user_field(user, "is_superuser", True)
+            self.update_user_field(user, "is_staff", True)
 
-    def find_user(self):
-        query = self.user_model.objects.filter(
+    def sso_user_query(self) -> QuerySet:
+        """Users linked to Google SSO, by Google ID or by normalised email.
+
+        Both columns are indexed on GoogleSSOUser, and the email column is kept
+        equal to the user email. Users matching the Google ID come first.
+        """
+        google_id = self.user_info.get("id")
+        return (
+            self.user_model.objects.filter(
+                Q(googlessouser__google_id=google_id)
+                | Q(googlessouser__email=self.user_info_email)
+            )
+            .alias(
+                google_id_match=Case(
+                    When(googlessouser__google_id=google_id, then=Value(0)),
+                    default=Value(1),
+                )
+            )
+            .order_by("google_id_match")
+        )
+
+    def find_sso_user(self):
+        """Find a returning user, using the GoogleSSOUser indexes.
+
+        Without GOOGLE_SSO_SAVE_BASIC_GOOGLE_INFO there are no GoogleSSOUser
+        rows to match, so no query is made.
+        """
+        if not self.save_basic_google_info:
+            return None
+        user = self.sso_user_query().select_related("googlessouser").first()
+        self.google_sso_user = user.googlessouser if user else None
+        return user
+
+    async def afind_sso_user(self):
+        if not self.save_basic_google_info:
+            return None
+        user = await self.sso_user_query().select_related("googlessouser").afirst()
+        self.google_sso_user = user.googlessouser if user else None
+        return user
+
+    def email_query(self) -> QuerySet:
+        return self.user_model.objects.filter(
             **{f"{self.email_field_name}__iexact": self.user_info_email}
         )
-        return query.get() if query.exists() else None
+
+    def find_user_by_email(self):
+        try:
+            return self.email_query().get()
+        except self.user_model.DoesNotExist:
+            return None
+
+    async def afind_user_by_email(self):
+        try:
+            return await self.email_query().aget()
+        except self.user_model.DoesNotExist:
+            return None
+
+    def find_user(self):
+        return self.find_sso_user() or self.find_user_by_email()
+
+    async def afind_user(self):
+        return await self.afind_sso_user() or await self.afind_user_by_email()
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def populate_email_domain(apps, schema_editor):
+    GoogleSSOUser = apps.get_model("django_google_sso", "GoogleSSOUser")
+    email_field_name = get_user_model().get_email_field_name()
+    sso_users = []
+    for sso_user in GoogleSSOUser.objects.select_related("user").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        email = getattr(sso_user.user, email_field_name, None) or ""
+        sso_user.email_domain = email.split("@")[-1].lower() if "@" in email else ""
+        sso_users.append(sso_user)
+        if len(sso_users) >= BATCH_SIZE:
+            GoogleSSOUser.objects.bulk_update(sso_users, ["email_domain"])
+            sso_users = []
+    if sso_users:
+        GoogleSSOUser.objects.bulk_update(sso_users, ["email_domain"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("django_google_sso", "0002_alter_googlessouser_picture_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlessouser",
+            name="email_domain",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=255),
+        ),
+        migrations.RunPython(populate_email_domain, migrations.RunPython.noop),
+    ]
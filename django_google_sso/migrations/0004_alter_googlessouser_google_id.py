@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def remove_duplicated_google_ids(apps, schema_editor):
+    """Keep only the newest row for each Google ID.
+
+    These rows hold only basic Google info, which is saved again on the
+    next login of the user.
+    """
+    GoogleSSOUser = apps.get_model("django_google_sso", "GoogleSSOUser")
+    duplicated = (
+        GoogleSSOUser.objects.values("google_id")
+        .annotate(newest_id=models.Max("id"), total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for row in duplicated:
+        GoogleSSOUser.objects.filter(google_id=row["google_id"]).exclude(
+            id=row["newest_id"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_google_sso", "0003_googlessouser_email_domain"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicated_google_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="googlessouser",
+            name="google_id",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def populate_email(apps, schema_editor):
+    GoogleSSOUser = apps.get_model("django_google_sso", "GoogleSSOUser")
+    email_field_name = get_user_model().get_email_field_name()
+    sso_users = []
+    for sso_user in GoogleSSOUser.objects.select_related("user").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        sso_user.email = (getattr(sso_user.user, email_field_name, None) or "").lower()
+        sso_users.append(sso_user)
+        if len(sso_users) >= BATCH_SIZE:
+            GoogleSSOUser.objects.bulk_update(sso_users, ["email"])
+            sso_users = []
+    if sso_users:
+        GoogleSSOUser.objects.bulk_update(sso_users, ["email"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("django_google_sso", "0004_alter_googlessouser_google_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlessouser",
+            name="email",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=254),
+        ),
+        migrations.RunPython(populate_email, migrations.RunPython.noop),
+    ]
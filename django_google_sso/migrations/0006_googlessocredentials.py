@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_google_sso", "0005_googlessouser_email"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoogleSSOCredentials",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.TextField()),
+                ("refresh_token", models.TextField(blank=True, default="")),
+                ("expiry", models.DateTimeField(blank=True, null=True)),
+                ("scopes", models.JSONField(blank=True, default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="google_sso_credentials",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Google SSO Credentials",
+                "verbose_name_plural": "Google SSO Credentials",
+                "db_table": "google_sso_credentials",
+            },
+        ),
+    ]
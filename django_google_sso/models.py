@@ -8,7 +8,9 @@ User = get_user_model()
 
 class GoogleSSOUser(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    google_id = models.CharField(max_length=255)
+    google_id = models.CharField(max_length=255, unique=True)
+    email = models.CharField(max_length=254, blank=True, default="", db_index=True)
+    email_domain = models.CharField(max_length=255, blank=True, default="", db_index=True)
     picture_url = models.URLField(max_length=2000)
     locale = models.CharField(max_length=5)
 
@@ -27,3 +29,23 @@ class GoogleSSOUser(models.Model):
     class Meta:
         db_table = "google_sso_user"
         verbose_name = _("Google SSO User")
+
+
+class GoogleSSOCredentials(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="google_sso_credentials"
+    )
+    token = models.TextField()
+    refresh_token = models.TextField(blank=True, default="")
+    expiry = models.DateTimeField(null=True, blank=True)
+    scopes = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        user_email = getattr(self.user, User.get_email_field_name())
+        return f"{user_email} (expires {self.expiry})"
+
+    class Meta:
+        db_table = "google_sso_credentials"
+        verbose_name = _("Google SSO Credentials")
+        verbose_name_plural = _("Google SSO Credentials")
@@ -0,0 +1,120 @@
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from loguru import logger
+
+from django_google_sso import conf
+
+# Maximum number of queries for each login path, not counting transaction
+# statements, the session, the Google credentials and Django `login()`.
+# See docs/advanced.md.
+QUERY_BUDGETS = {
+    "new_user": 6,
+    "returning_user": 5,
+    "first_sso_login": 7,
+}
+TRANSACTION_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+_current_counter: ContextVar["QueryCounter | None"] = ContextVar(
+    "django_google_sso_query_counter", default=None
+)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass
+class QueryCounter:
+    queries: int = 0
+    paused: bool = False
+    login_path: str | None = None
+
+    @contextmanager
+    def pause(self) -> Iterator[None]:
+        """Do not count the queries made inside this block."""
+        self.paused = True
+        try:
+            yield
+        finally:
+            self.paused = False
+
+    def check(self, mode: str) -> None:
+        if self.login_path is None:
+            return
+        budget = QUERY_BUDGETS[self.login_path] + conf.GOOGLE_SSO_QUERY_BUDGET_EXTRA
+        logger.debug(f"Login path {self.login_path} used {self.queries} queries.")
+        if self.queries <= budget:
+            return
+        message = (
+            f"Google SSO login used {self.queries} queries for {self.login_path}, "
+            f"above the budget of {budget} queries."
+        )
+        if mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _current_counter.get()
+    if (
+        counter is not None
+        and not counter.paused
+        and not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS)
+    ):
+        counter.queries += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter() -> None:
+    """Add the query counter to the database connections of this thread."""
+    for connection in connections.all():
+        if _count_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_count_queries)
+
+
+@contextmanager
+def query_budget() -> Iterator[QueryCounter]:
+    """Count the queries made during the login.
+
+    Does nothing unless GOOGLE_SSO_QUERY_BUDGET_MODE is "log" or "raise".
+    The caller must set the `login_path` of the counter, after the user
+    is found or created.
+    """
+    counter = QueryCounter()
+    mode = conf.GOOGLE_SSO_QUERY_BUDGET_MODE
+    if not mode:
+        yield counter
+        return
+    install_query_counter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+    counter.check(mode)
+
+
+@asynccontextmanager
+async def aquery_budget() -> AsyncIterator[QueryCounter]:
+    """Async version of `query_budget`.
+
+    The async ORM runs queries in a worker thread, so the counter is added
+    to the connections of that thread.
+    """
+    counter = QueryCounter()
+    mode = conf.GOOGLE_SSO_QUERY_BUDGET_MODE
+    if not mode:
+        yield counter
+        return
+    await sync_to_async(install_query_counter)()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+    counter.check(mode)
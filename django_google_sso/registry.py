@@ -0,0 +1,67 @@
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from django.utils.module_loading import import_string
+from loguru import logger
+
+from django_google_sso import conf
+
+CALLBACK_SETTINGS = (
+    "GOOGLE_SSO_PRE_VALIDATE_CALLBACK",
+    "GOOGLE_SSO_PRE_CREATE_CALLBACK",
+    "GOOGLE_SSO_PRE_LOGIN_CALLBACK",
+)
+BACKEND_SETTING = "GOOGLE_SSO_AUTHENTICATION_BACKEND"
+CLASS_SETTINGS = ("GOOGLE_SSO_STATE_STORE", "GOOGLE_SSO_WRITE_QUEUE")
+
+_registry: dict[str, Any] = {}
+_registry_lock = threading.Lock()
+
+
+def import_path(path: str) -> Any:
+    """Import the object for the dotted path, only once per process.
+
+    :raises ImportError: If the module or the attribute does not exist.
+    """
+    try:
+        return _registry[path]
+    except KeyError:
+        pass
+    imported = import_string(path)
+    with _registry_lock:
+        _registry[path] = imported
+    return imported
+
+
+def get_callable(value: str | Callable) -> Callable:
+    """Return the callable for a dotted path, or the callable itself."""
+    if callable(value):
+        return value
+    return import_path(value)
+
+
+def build_registry() -> dict[str, str]:
+    """Import the hooks, the authentication backend and the classes in settings.
+
+    Settings defined as callables depend on the request, and are imported
+    on first use.
+
+    :return: The invalid settings, with their error message.
+    """
+    errors = {}
+    for setting in (*CALLBACK_SETTINGS, BACKEND_SETTING, *CLASS_SETTINGS):
+        value = getattr(conf, setting)
+        if not value or callable(value):
+            continue
+        try:
+            import_path(value)
+        except ImportError as error:
+            logger.error(f"Cannot import {setting}: {error}")
+            errors[setting] = str(error)
+    return errors
+
+
+def clear_registry() -> None:
+    with _registry_lock:
+        _registry.clear()
@@ -0,0 +1,222 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from django.core import signing
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse
+from loguru import logger
+
+from django_google_sso import conf
+from django_google_sso.registry import import_path
+
+STATE_COOKIE_NAME = "google_sso_state"
+STATE_COOKIE_SALT = "django_google_sso.states.SignedCookieStateStore"
+STATE_CACHE_KEY = "django_google_sso:state:{state}"
+PENDING_STATES_SIZE = 5
+
+
+@dataclass
+class FlowState:
+    """Data kept between the login start and the callback."""
+
+    state: str
+    next_url: str
+    code_verifier: str | None = None
+
+
+class BaseStateStore:
+    """Keep the OAuth flow state between `start_login` and `callback`.
+
+    :param request: The current request.
+    :param timeout: Time, in seconds, the state is valid.
+    """
+
+    def __init__(self, request: HttpRequest, timeout: int):
+        self.request = request
+        self.timeout = timeout
+
+    def save(self, flow_state: FlowState) -> None:
+        raise NotImplementedError
+
+    def load(self, state: str | None) -> FlowState | None:
+        """Return the flow state for the `state` received on callback.
+
+        :return: None if the state is unknown or expired.
+        """
+        raise NotImplementedError
+
+    def update_response(self, response: HttpResponse) -> None:
+        """Add to the response the data saved or removed by this store."""
+
+
+class SessionStateStore(BaseStateStore):
+    """Keep the state in the request session. This is the default store."""
+
+    def save(self, flow_state: FlowState) -> None:
+        session = self.request.session
+        session.set_expiry(self.timeout)
+        session["sso_pending_states"] = add_pending_state(
+            session.get("sso_pending_states") or {},
+            flow_state.state,
+            {"next_url": flow_state.next_url, "code_verifier": flow_state.code_verifier},
+            self.timeout,
+        )
+        # The latest login is also kept in the keys used by older versions.
+        session["sso_state"] = flow_state.state
+        session["sso_next_url"] = flow_state.next_url
+        if flow_state.code_verifier:
+            session["sso_code_verifier"] = flow_state.code_verifier
+
+    def load(self, state: str | None) -> FlowState | None:
+        session = self.request.session
+        pending = session.get("sso_pending_states")
+        if pending is not None:
+            entry = pop_pending_state(pending, state)
+            session["sso_pending_states"] = pending
+            return FlowState(state=state, **entry) if entry is not None else None
+
+        # Sessions saved by older versions only have the latest login.
+        session_state = session.get("sso_state")
+        if not state or not session_state or state != session_state:
+            return None
+        return FlowState(
+            state=session_state,
+            next_url=session.get("sso_next_url"),
+            code_verifier=session.get("sso_code_verifier"),
+        )
+
+
+class SignedCookieStateStore(BaseStateStore):
+    """Keep the state in a signed, expiring cookie, without server storage.
+
+    The cookie is signed with Django's signing module, using SECRET_KEY.
+    It can't be changed by the browser, but it is not encrypted.
+    """
+
+    def __init__(self, request: HttpRequest, timeout: int):
+        super().__init__(request, timeout)
+        self._cookie_value: str | None = None
+        self._delete_cookie = False
+
+    def save(self, flow_state: FlowState) -> None:
+        self._save_pending_state(
+            flow_state.state,
+            {"next_url": flow_state.next_url, "code_verifier": flow_state.code_verifier},
+        )
+
+    def load(self, state: str | None) -> FlowState | None:
+        entry = self._pop_pending_state(state)
+        if entry is None:
+            return None
+        return FlowState(state=state, **entry)
+
+    def _save_pending_state(self, state: str, entry: dict[str, Any]) -> None:
+        pending = add_pending_state(self._read_cookie(), state, entry, self.timeout)
+        self._write_cookie(pending)
+
+    def _pop_pending_state(self, state: str | None) -> dict[str, Any] | None:
+        pending = self._read_cookie()
+        entry = pop_pending_state(pending, state)
+        if pending:
+            self._write_cookie(pending)
+        return entry
+
+    def _write_cookie(self, pending: dict[str, dict]) -> None:
+        self._cookie_value = signing.dumps(pending, salt=STATE_COOKIE_SALT, compress=True)
+
+    def _read_cookie(self) -> dict[str, dict]:
+        """Return the pending states in the cookie, if it is valid and not expired."""
+        cookie_value = self.request.COOKIES.get(STATE_COOKIE_NAME)
+        if not cookie_value:
+            return {}
+        self._delete_cookie = True
+        try:
+            pending = signing.loads(
+                cookie_value, salt=STATE_COOKIE_SALT, max_age=self.timeout
+            )
+        except signing.BadSignature as error:
+            logger.debug(f"Invalid Google SSO state cookie: {error}")
+            return {}
+        if not isinstance(pending, dict):
+            return {}
+        return {state: entry for state, entry in pending.items() if isinstance(entry, dict)}
+
+    def update_response(self, response: HttpResponse) -> None:
+        if self._cookie_value is not None:
+            response.set_cookie(
+                STATE_COOKIE_NAME,
+                self._cookie_value,
+                max_age=self.timeout,
+                secure=self.request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        elif self._delete_cookie:
+            response.delete_cookie(STATE_COOKIE_NAME, samesite="Lax")
+
+
+class CacheStateStore(SignedCookieStateStore):
+    """Keep the state in the Django cache, keyed by the `state` value.
+
+    Each state can be used only once. A signed cookie with the pending
+    `state` values binds the login to the browser which started it.
+    """
+
+    @property
+    def cache(self):
+        return caches[conf.GOOGLE_SSO_CACHE_ALIAS]
+
+    def save(self, flow_state: FlowState) -> None:
+        cache_key = get_state_cache_key(flow_state.state)
+        self.cache.set(cache_key, asdict(flow_state), self.timeout)
+        self._save_pending_state(flow_state.state, {})
+
+    def load(self, state: str | None) -> FlowState | None:
+        if self._pop_pending_state(state) is None:
+            return None
+        cache_key = get_state_cache_key(state)
+        data = self.cache.get(cache_key)
+        # Only the request which deletes the key can use the state.
+        if data is None or not self.cache.delete(cache_key):
+            return None
+        return FlowState(**data)
+
+
+def add_pending_state(
+    pending: dict[str, dict], state: str, entry: dict[str, Any], timeout: int
+) -> dict[str, dict]:
+    """Add the state to the pending states of the browser.
+
+    Expired states are removed, and the oldest ones are evicted above
+    PENDING_STATES_SIZE, so each browser can start a few logins at once.
+    """
+    now = time.time()
+    pending = {
+        key: value for key, value in pending.items() if value.get("expires_at", 0) > now
+    }
+    pending.pop(state, None)
+    pending[state] = {**entry, "expires_at": now + timeout}
+    while len(pending) > PENDING_STATES_SIZE:
+        del pending[next(iter(pending))]
+    return pending
+
+
+def pop_pending_state(pending: dict[str, dict], state: str | None) -> dict | None:
+    """Remove the state from the pending states and return its data.
+
+    :return: None if the state is unknown or expired.
+    """
+    entry = pending.pop(state, None) if state else None
+    if entry is None or entry.pop("expires_at", 0) <= time.time():
+        return None
+    return entry
+
+
+def get_state_cache_key(state: str) -> str:
+    return STATE_CACHE_KEY.format(state=state)
+
+
+def get_state_store(request: HttpRequest, timeout: int) -> BaseStateStore:
+    """Return the store defined in GOOGLE_SSO_STATE_STORE for this request."""
+    return import_path(conf.GOOGLE_SSO_STATE_STORE)(request, timeout)
@@ -1,28 +1,96 @@
 import importlib
 import re
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from types import ModuleType
 from typing import Callable
 
 from django import template
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.http import HttpRequest
 from django.templatetags.static import static
-from django.urls import reverse
 from loguru import logger
 
-from django_google_sso.helpers import is_admin_path, is_page_path
+from django_google_sso.helpers import is_admin_path, is_page_path, reverse_route
 
 register = template.Library()
 
+PROVIDER_PATTERN = re.compile(r"^django_(.+)_sso$")
+PROVIDER_REGISTRY_SETTINGS = {
+    "INSTALLED_APPS",
+    "ROOT_URLCONF",
+    "STATIC_URL",
+    "STORAGES",
+}
 
-@register.simple_tag(takes_context=True)
-def define_sso_providers(context):
-    provider_pattern = re.compile(r"^django_(.+)_sso$")
+
+@dataclass
+class SSOProvider:
+    """Installed SSO provider, like `google` for django_google_sso.
+
+    The package and the config module do not change between requests, so
+    they are found only once. The login url depends on the request URLconf
+    and script prefix, and uses the route cache.
+    """
+
+    name: str
+    conf: ModuleType
+
+    @property
+    def login_url(self) -> str:
+        return reverse_route(f"django_{self.name}_sso:oauth_start_login")
+
+    @cached_property
+    def css_url(self) -> str:
+        return static(f"django_{self.name}_sso/{self.name}_button.css")
+
+
+_providers: list[SSOProvider] | None = None
+_providers_lock = threading.Lock()
+
+
+def build_provider_registry() -> list[SSOProvider]:
+    """Find the SSO providers in INSTALLED_APPS and import their config."""
+    global _providers
     providers = []
     for app in settings.INSTALLED_APPS:
-        match = re.search(provider_pattern, app)
-        if match:
-            providers.append(match.group(1))
+        match = PROVIDER_PATTERN.search(app)
+        if not match:
+            continue
+        provider = match.group(1)
+        package_name = f"django_{provider}_sso"
+        try:
+            package = importlib.import_module(package_name)
+            providers.append(SSOProvider(name=provider, conf=getattr(package, "conf")))
+        except (ImportError, AttributeError) as e:
+            logger.error(f"Error importing {package_name}: {e}")
+    with _providers_lock:
+        _providers = providers
+    return providers
+
+
+def get_sso_providers() -> list[SSOProvider]:
+    providers = _providers
+    if providers is None:
+        providers = build_provider_registry()
+    return providers
+
+
+def clear_provider_registry(*, setting: str | None = None, **kwargs) -> None:
+    global _providers
+    if setting is not None and setting not in PROVIDER_REGISTRY_SETTINGS:
+        return
+    with _providers_lock:
+        _providers = None
+
 
+setting_changed.connect(clear_provider_registry)
+
+
+@register.simple_tag(takes_context=True)
+def define_sso_providers(context):
     sso_providers = []
     request = context.get("request")
 
@@ -32,11 +100,11 @@ def define_sso_providers(context):
     if request is not None and hasattr(request, "_sso_providers_cache"):
         return request._sso_providers_cache
 
-    for provider in providers:
+    for sso_provider in get_sso_providers():
+        provider = sso_provider.name
         package_name = f"django_{provider}_sso"
         try:
-            package = importlib.import_module(package_name)
-            conf = getattr(package, "conf")
+            conf = sso_provider.conf
             sso_enabled_conf = f"{provider.upper()}_SSO_ENABLED"
             sso_enabled: bool = getattr(conf, sso_enabled_conf)
             sso_pages_enabled_conf = f"{provider.upper()}_SSO_PAGES_ENABLED"
@@ -109,12 +177,12 @@ def define_sso_providers(context):
                         "name": provider,
                         "logo_url": logo_conf,
                         "text": text_conf,
-                        "login_url": reverse(f"django_{provider}_sso:oauth_start_login"),
-                        "css_url": static(f"django_{provider}_sso/{provider}_button.css"),
+                        "login_url": sso_provider.login_url,
+                        "css_url": sso_provider.css_url,
                     }
                 )
         except Exception as e:
-            logger.error(f"Error importing {package_name}: {e}")
+            logger.error(f"Error loading {package_name}: {e}")
 
     if request is not None:
         setattr(request, "_sso_providers_cache", sso_providers)
@@ -1,25 +1,43 @@
 import importlib
+import json
+import time
 from copy import deepcopy
 from typing import Generator
 from urllib.parse import quote, urlencode
 
 import pytest
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from django.apps import apps
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.db import connection, models
-from django.test import AsyncClient
+from django.test import AsyncClient, AsyncRequestFactory
 from django.urls import reverse
+from google.auth import crypt, jwt
 
-from django_google_sso import conf
+from django_google_sso import certs, conf, helpers, transport
 from django_google_sso import conf as conf_module
 from django_google_sso.main import GoogleAuth
 
 SECRET_PATH = "/secret/"
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Test databases are flushed without sending signals
+    Site.objects.clear_cache()
+    helpers.clear_site_cache()
+    cache.clear()
+    yield
+    helpers.clear_site_cache()
+    cache.clear()
+
+
 @pytest.fixture
 def query_string():
     return urlencode(
@@ -121,6 +139,18 @@ def aclient_with_session(client_with_session, settings):
     return ac
 
 
+@pytest.fixture
+def async_callback_request(query_string, settings):
+    """An async callback request with a valid state on a signed cookie session."""
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+    request = AsyncRequestFactory().get(f"/google_sso/callback/?{query_string}")
+    middleware = SessionMiddleware(get_response=lambda req: None)
+    middleware.process_request(request)
+    request.session.update({"sso_state": "foo", "sso_next_url": SECRET_PATH})
+    request._messages = FallbackStorage(request)
+    return request
+
+
 @pytest.fixture
 def callback_url(query_string):
     return f"{reverse('django_google_sso:oauth_callback')}?{query_string}"
@@ -304,3 +334,58 @@ def custom_user_model(settings) -> Generator[type, None, None]:
         apps.clear_cache()
 
         importlib.reload(importlib.import_module("django_google_sso.main"))
+
+
+@pytest.fixture
+def google_client_config(monkeypatch):
+    monkeypatch.setattr(conf, "GOOGLE_SSO_CLIENT_ID", "client_id")
+    monkeypatch.setattr(conf, "GOOGLE_SSO_PROJECT_ID", "project_id")
+    monkeypatch.setattr(conf, "GOOGLE_SSO_CLIENT_SECRET", "client_secret")
+    monkeypatch.setattr(conf, "GOOGLE_SSO_CALLBACK_DOMAIN", "localhost:8000")
+
+
+@pytest.fixture
+def google_certs(mocker):
+    """Serve a local signing key as the Google certs endpoint.
+
+    Returns a function to create ID Tokens signed with this key.
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id="test-kid")
+
+    def certs_response(*args, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Cache-Control"] = "public, max-age=3600"
+        response._content = json.dumps({"test-kid": public_pem.decode()}).encode()
+        return response
+
+    request_mock = mocker.patch.object(
+        transport.get_http_session(), "request", side_effect=certs_response
+    )
+
+    def make_id_token(**claims) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": "client_id",
+            "iat": now,
+            "exp": now + 3600,
+            **claims,
+        }
+        return jwt.encode(signer, payload).decode()
+
+    make_id_token.request_mock = request_mock
+    cache.clear()
+    certs.clear_local_certs()
+    yield make_id_token
+    cache.clear()
+    certs.clear_local_certs()
@@ -0,0 +1,154 @@
+import httpx
+import pytest
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+
+from django_google_sso import main, transport
+from django_google_sso.main import GoogleAuth
+from django_google_sso.tests.conftest import SECRET_PATH
+from django_google_sso.views import acallback
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def async_google(mocker, google_response, settings):
+    settings.GOOGLE_SSO_ALLOWABLE_DOMAINS = ["example.com"]
+    settings.GOOGLE_SSO_PRE_LOGIN_CALLBACK = "django_google_sso.hooks.pre_login_user"
+    settings.GOOGLE_SSO_PRE_CREATE_CALLBACK = "django_google_sso.hooks.pre_create_user"
+    settings.GOOGLE_SSO_PRE_VALIDATE_CALLBACK = "django_google_sso.hooks.pre_validate_user"
+    mocker.patch.object(GoogleAuth, "flow")
+    mocker.patch.object(GoogleAuth, "get_user_token", return_value="12345")
+    mocker.patch.object(GoogleAuth, "afetch_token", return_value={})
+    mocker.patch.object(GoogleAuth, "aget_user_info", return_value=google_response)
+
+
+async def test_async_new_user_login(async_google, async_callback_request):
+    # Act
+    response = await acallback(async_callback_request)
+
+    # Assert
+    assert response.status_code == 302
+    assert response.url == SECRET_PATH
+    assert await User.objects.acount() == 1
+    assert SESSION_KEY in async_callback_request.session
+
+
+async def test_async_bad_state(async_google, async_callback_request):
+    # Arrange
+    async_callback_request.session["sso_state"] = "bad_dog"
+
+    # Act
+    response = await acallback(async_callback_request)
+
+    # Assert
+    assert response.status_code == 302
+    assert await User.objects.acount() == 0
+    assert "State Mismatch. Time expired?" in [
+        m.message for m in get_messages(async_callback_request)
+    ]
+
+
+async def test_async_token_error(async_google, async_callback_request, mocker):
+    # Arrange
+    GoogleAuth.afetch_token.side_effect = ValueError("invalid_grant")
+
+    # Act
+    response = await acallback(async_callback_request)
+
+    # Assert
+    assert response.status_code == 302
+    assert await User.objects.acount() == 0
+    assert "Error while fetching token from SSO: invalid_grant." in [
+        m.message for m in get_messages(async_callback_request)
+    ]
+
+
+async def test_afetch_token_and_user_info(
+    async_callback_request, google_response, monkeypatch, mocker, settings
+):
+    # Arrange
+    settings.GOOGLE_SSO_PRE_LOGIN_CALLBACK = "django_google_sso.hooks.pre_login_user"
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_CLIENT_ID", "client_id")
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_PROJECT_ID", "project_id")
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_CLIENT_SECRET", "client_secret")
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_CALLBACK_DOMAIN", "localhost:8000")
+    requests_sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_sent.append(request)
+        if request.url.host == "oauth2.googleapis.com":
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": "access-token",
+                    "token_type": "Bearer",
+                    "expires_in": 3599,
+                    "scope": " ".join(main.conf.GOOGLE_SSO_SCOPES),
+                },
+            )
+        return httpx.Response(200, json=google_response)
+
+    mock_transport = httpx.MockTransport(handler)
+    original_client = httpx.AsyncClient
+    mocker.patch.object(
+        transport.httpx,
+        "AsyncClient",
+        lambda **kwargs: original_client(transport=mock_transport, **kwargs),
+    )
+    transport.reset_http_clients()
+    google = GoogleAuth(async_callback_request)
+
+    # Act
+    token = await google.afetch_token(code="12345")
+    user_info = await google.aget_user_info()
+
+    # Assert
+    assert token["access_token"] == "access-token"
+    assert google.get_user_token() == "access-token"
+    assert user_info == google_response
+    assert b"code=12345" in requests_sent[0].content
+    assert requests_sent[1].headers["Authorization"] == "Bearer access-token"
+
+
+async def test_async_query_budget(async_google, async_callback_request, settings, mocker):
+    # Arrange
+    from django_google_sso.queries import QUERY_BUDGETS, QueryCounter
+
+    settings.GOOGLE_SSO_QUERY_BUDGET_MODE = "raise"
+    check = mocker.spy(QueryCounter, "check")
+
+    # Act
+    response = await acallback(async_callback_request)
+
+    # Assert
+    counter = check.call_args.args[0]
+    assert response.url == SECRET_PATH
+    assert counter.login_path == "new_user"
+    assert 0 < counter.queries <= QUERY_BUDGETS["new_user"]
+
+
+async def test_async_callback_builds_flow_outside_event_loop(
+    async_callback_request, google_response, monkeypatch, mocker, settings
+):
+    # Arrange
+    settings.GOOGLE_SSO_PRE_LOGIN_CALLBACK = "django_google_sso.hooks.pre_login_user"
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_CLIENT_ID", "client_id")
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_PROJECT_ID", "project_id")
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_CLIENT_SECRET", "client_secret")
+    monkeypatch.setattr(main.conf, "GOOGLE_SSO_CALLBACK_DOMAIN", None)
+    async_callback_request.session["sso_code_verifier"] = "verifier"
+    mocker.patch.object(GoogleAuth, "afetch_token", return_value={})
+    mocker.patch.object(GoogleAuth, "aget_user_info", return_value=google_response)
+    mocker.patch.object(GoogleAuth, "get_user_token", return_value="12345")
+    google = GoogleAuth(async_callback_request)
+    mocker.patch("django_google_sso.views.GoogleAuth", return_value=google)
+
+    # Act
+    response = await acallback(async_callback_request)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    assert google.flow.code_verifier == "verifier"
+    assert "example.com" in google.flow.redirect_uri
@@ -114,3 +114,42 @@ def test_pages_login_not_allowed(
     assert User.objects.count() == 0
     assert response.url == "/"
     assert response.wsgi_request.user.is_authenticated is False
+
+
+def test_callable_called_once_per_request(client_with_session, settings, callback_url):
+    # Arrange
+    calls = []
+
+    def get_staff_list(request):
+        calls.append(request)
+        return []
+
+    settings.GOOGLE_SSO_STAFF_LIST = get_staff_list
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.status_code == 302
+    assert User.objects.count() == 1
+    assert len(calls) == 1
+    assert calls[0] is response.wsgi_request
+
+
+def test_resolved_value_changes_with_setting(rf, settings):
+    # Arrange
+    from django_google_sso.main import GoogleAuth, RequestSSOSettings, UserHelper
+
+    request = rf.get("/")
+    settings.GOOGLE_SSO_TEXT = lambda req: "first"
+
+    # Act
+    first = GoogleAuth(request).get_sso_value("text")
+    again = UserHelper({}, request).google.get_sso_value("text")
+    settings.GOOGLE_SSO_TEXT = lambda req: "second"
+    second = GoogleAuth(request).get_sso_value("text")
+
+    # Assert
+    assert first == again == "first"
+    assert second == "second"
+    assert RequestSSOSettings.for_request(request).callable_calls == 2
@@ -0,0 +1,138 @@
+import time
+
+import pytest
+import requests
+from django.core.cache import cache
+
+from django_google_sso import certs
+
+pytestmark = pytest.mark.django_db
+
+
+def test_certs_are_fetched_once(google_certs):
+    # Act
+    first_cert = certs.get_cert("test-kid")
+    second_cert = certs.get_cert("test-kid")
+
+    # Assert
+    assert first_cert == second_cert
+    assert google_certs.request_mock.call_count == 1
+
+
+def test_certs_from_shared_cache(google_certs):
+    # Arrange
+    certs.get_cert("test-kid")
+    certs.clear_local_certs()
+
+    # Act
+    cert = certs.get_cert("test-kid")
+
+    # Assert
+    assert cert is not None
+    assert google_certs.request_mock.call_count == 1
+
+
+def test_certs_honour_max_age(google_certs):
+    # Act
+    certs.get_cert("test-kid")
+
+    # Assert
+    payload = cache.get(certs.CERTS_CACHE_KEY)
+    assert payload["expires_at"] == pytest.approx(time.time() + 3600, abs=5)
+    assert certs._local_certs["test-kid"][1] == payload["expires_at"]
+
+
+def test_unknown_kid_refresh(google_certs):
+    # Arrange
+    certs.get_cert("test-kid")
+    payload = cache.get(certs.CERTS_CACHE_KEY)
+    payload["fetched_at"] -= certs.CERTS_MIN_REFRESH_INTERVAL
+    cache.set(certs.CERTS_CACHE_KEY, payload)
+
+    # Act
+    first_unknown = certs.get_cert("rotated-kid")
+    second_unknown = certs.get_cert("rotated-kid")
+
+    # Assert
+    assert first_unknown is None
+    assert second_unknown is None
+    assert google_certs.request_mock.call_count == 2
+
+
+def test_wait_for_other_worker_refresh(google_certs, mocker):
+    # Arrange
+    cache.add(certs.CERTS_LOCK_KEY, True)
+    other_worker_payload = {
+        "certs": {"test-kid": "other-worker-cert"},
+        "expires_at": time.time() + 3600,
+        "fetched_at": time.time(),
+    }
+
+    def other_worker_refresh(seconds):
+        cache.set(certs.CERTS_CACHE_KEY, other_worker_payload)
+
+    mocker.patch.object(certs.time, "sleep", side_effect=other_worker_refresh)
+
+    # Act
+    cert = certs.get_cert("test-kid")
+
+    # Assert
+    assert cert == "other-worker-cert"
+    google_certs.request_mock.assert_not_called()
+
+
+def test_verify_id_token(google_certs):
+    # Arrange
+    token = google_certs(sub="12345", email="foo@example.com")
+
+    # Act
+    claims = certs.verify_id_token(token, audience="client_id")
+
+    # Assert
+    assert claims["sub"] == "12345"
+
+
+def test_verify_id_token_unknown_kid(google_certs):
+    # Arrange
+    token = google_certs(sub="12345")
+    empty_certs = requests.Response()
+    empty_certs.status_code = 200
+    empty_certs._content = b"{}"
+    google_certs.request_mock.side_effect = None
+    google_certs.request_mock.return_value = empty_certs
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="Certificate for key id test-kid not found"):
+        certs.verify_id_token(token, audience="client_id")
+
+
+def test_stale_certs_on_google_outage(google_certs):
+    # Arrange
+    certs.get_cert("test-kid")
+    certs.clear_local_certs()
+    payload = cache.get(certs.CERTS_CACHE_KEY)
+    payload["expires_at"] = payload["fetched_at"] = time.time() - 60
+    cache.set(certs.CERTS_CACHE_KEY, payload)
+    google_certs.request_mock.side_effect = requests.ConnectionError("Google is down")
+
+    # Act
+    cert = certs.get_cert("test-kid")
+
+    # Assert
+    assert cert == payload["certs"]["test-kid"]
+    assert google_certs.request_mock.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "error", [requests.ConnectionError, requests.Timeout, requests.HTTPError]
+)
+def test_certs_not_found_on_google_outage(google_certs, error):
+    # Arrange
+    google_certs.request_mock.side_effect = error("Google is down")
+
+    # Act
+    cert = certs.get_cert("test-kid")
+
+    # Assert
+    assert cert is None
+    assert cache.get(certs.CERTS_LOCK_KEY) is None
@@ -7,3 +7,37 @@ def test_conf_from_settings(settings):
 
     # Assert
     assert conf.GOOGLE_SSO_ENABLED is False
+
+
+def test_conf_snapshot(mocker, settings):
+    # Arrange
+    settings.GOOGLE_SSO_TEXT = "First Text"
+    assert conf.GOOGLE_SSO_TEXT == "First Text"
+    spy = mocker.spy(conf.GoogleSSOSettings, "_get_setting")
+
+    # Act
+    first = conf.GOOGLE_SSO_TEXT
+    settings.GOOGLE_SSO_TEXT = "Second Text"
+    second = conf.GOOGLE_SSO_TEXT
+    again = conf.GOOGLE_SSO_TEXT
+
+    # Assert
+    assert first == "First Text"
+    assert second == again == "Second Text"
+    assert spy.call_count == 1
+
+
+def test_conf_enable_logs(mocker, settings):
+    # Arrange
+    enable = mocker.patch("django_google_sso.conf.logger.enable")
+    disable = mocker.patch("django_google_sso.conf.logger.disable")
+
+    # Act
+    settings.GOOGLE_SSO_ENABLE_LOGS = False
+    first = conf.GOOGLE_SSO_ENABLE_LOGS
+    second = conf.GOOGLE_SSO_ENABLE_LOGS
+
+    # Assert
+    assert first is second is False
+    disable.assert_called_once_with("django_google_sso")
+    enable.assert_not_called()
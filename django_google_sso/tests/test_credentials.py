@@ -0,0 +1,156 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from google.oauth2.credentials import Credentials
+
+from django_google_sso import credentials as credentials_module
+from django_google_sso.credentials import (
+    CREDENTIALS_LOCK_KEY,
+    get_credentials,
+    save_credentials,
+)
+from django_google_sso.main import GoogleAuth
+from django_google_sso.models import GoogleSSOCredentials
+from django_google_sso.tests.conftest import SECRET_PATH
+
+pytestmark = pytest.mark.django_db
+
+
+def utc_naive_now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create(username="foo", email="foo@example.com")
+
+
+@pytest.fixture
+def expiring_credentials(user):
+    return save_credentials(
+        user,
+        Credentials(
+            token="old-token",
+            refresh_token="refresh-token",
+            expiry=utc_naive_now() + timedelta(seconds=60),
+        ),
+    )
+
+
+@pytest.fixture
+def refresh_mock(mocker):
+    def refresh(self, request):
+        self.token = "new-token"
+        self.expiry = utc_naive_now() + timedelta(hours=1)
+
+    return mocker.patch.object(Credentials, "refresh", autospec=True, side_effect=refresh)
+
+
+def test_save_credentials_keeps_refresh_token(user, expiring_credentials):
+    # Act
+    save_credentials(user, Credentials(token="new-token"))
+
+    # Assert
+    saved_credentials = GoogleSSOCredentials.objects.get(user=user)
+    assert saved_credentials.token == "new-token"
+    assert saved_credentials.refresh_token == "refresh-token"
+
+
+def test_get_credentials_without_saved_credentials(user, callback_request):
+    # Act
+    credentials = get_credentials(callback_request, user)
+
+    # Assert
+    assert credentials is None
+
+
+def test_get_valid_credentials(user, callback_request, refresh_mock):
+    # Arrange
+    expiry = utc_naive_now() + timedelta(hours=1)
+    save_credentials(user, Credentials(token="token", refresh_token="r", expiry=expiry))
+
+    # Act
+    credentials = get_credentials(callback_request, user)
+
+    # Assert
+    assert credentials.token == "token"
+    assert credentials.refresh_token == "r"
+    refresh_mock.assert_not_called()
+
+
+def test_refresh_before_expiry(user, expiring_credentials, callback_request, refresh_mock):
+    # Act
+    credentials = get_credentials(callback_request, user)
+
+    # Assert
+    assert credentials.token == "new-token"
+    assert GoogleSSOCredentials.objects.get(user=user).token == "new-token"
+    assert cache.get(CREDENTIALS_LOCK_KEY.format(user_id=user.pk)) is None
+    refresh_mock.assert_called_once()
+
+
+def test_wait_for_refresh_in_progress(
+    user, expiring_credentials, callback_request, refresh_mock, mocker
+):
+    # Arrange
+    lock_key = CREDENTIALS_LOCK_KEY.format(user_id=user.pk)
+    cache.set(lock_key, True)
+
+    def refresh_elsewhere(seconds):
+        expiring_credentials.token = "refreshed-elsewhere"
+        expiring_credentials.expiry = datetime.now(UTC) + timedelta(hours=1)
+        expiring_credentials.save()
+        cache.delete(lock_key)
+
+    mocker.patch.object(credentials_module.time, "sleep", side_effect=refresh_elsewhere)
+
+    # Act
+    credentials = get_credentials(callback_request, user)
+
+    # Assert
+    assert credentials.token == "refreshed-elsewhere"
+    refresh_mock.assert_not_called()
+
+
+def test_credentials_without_time_zone_support(
+    user, callback_request, refresh_mock, settings
+):
+    # Arrange
+    settings.USE_TZ = False
+    save_credentials(
+        user,
+        Credentials(token="old-token", refresh_token="r", expiry=utc_naive_now()),
+    )
+
+    # Act
+    credentials = get_credentials(callback_request, user)
+
+    # Assert
+    saved_credentials = GoogleSSOCredentials.objects.get(user=user)
+    assert credentials.token == "new-token"
+    assert saved_credentials.expiry.tzinfo is None
+    assert saved_credentials.expiry > timezone.now() + timedelta(minutes=55)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_login_saves_credentials(client_with_session, callback_url, settings):
+    # Arrange
+    settings.GOOGLE_SSO_SAVE_CREDENTIALS = True
+    settings.GOOGLE_SSO_SAVE_ACCESS_TOKEN = False
+    expiry = utc_naive_now() + timedelta(hours=1)
+    GoogleAuth.flow.credentials = Credentials(
+        token="token", refresh_token="refresh-token", expiry=expiry
+    )
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    saved_credentials = GoogleSSOCredentials.objects.get()
+    assert response.url == SECRET_PATH
+    assert saved_credentials.user == response.wsgi_request.user
+    assert saved_credentials.refresh_token == "refresh-token"
+    assert saved_credentials.expiry == expiry.replace(tzinfo=UTC)
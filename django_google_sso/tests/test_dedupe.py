@@ -0,0 +1,128 @@
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponseRedirect
+from django.test import Client
+
+from django_google_sso import dedupe
+from django_google_sso.checks.warnings import check_callback_cache
+from django_google_sso.dedupe import CallbackDedupe, logged_in_redirect
+from django_google_sso.main import GoogleAuth
+from django_google_sso.tests.conftest import SECRET_PATH
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def callback_dedupe(callback_request):
+    return CallbackDedupe.for_request(callback_request)
+
+
+def test_late_duplicate_callback(client_with_session, callback_url, settings):
+    # Arrange
+    settings.GOOGLE_SSO_SAVE_ACCESS_TOKEN = False
+    first_response = client_with_session.get(callback_url)
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert first_response.url == SECRET_PATH
+    assert response.url == SECRET_PATH
+    assert response.wsgi_request.user.is_authenticated is True
+    GoogleAuth.flow.fetch_token.assert_called_once()
+
+
+def test_failed_replay_keeps_result(client_with_session, callback_url, settings):
+    # Arrange
+    settings.GOOGLE_SSO_SAVE_ACCESS_TOKEN = False
+    client_with_session.get(callback_url)
+    replay_response = Client().get(callback_url)
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert replay_response.url == "/"
+    assert response.url == SECRET_PATH
+    GoogleAuth.flow.fetch_token.assert_called_once()
+
+
+def test_concurrent_duplicate_waits_for_result(callback_dedupe, mocker):
+    # Arrange
+    cache.set(callback_dedupe.lock_key, True)
+    handler = mocker.Mock()
+    sleep = mocker.patch.object(dedupe.time, "sleep")
+    sleep.side_effect = lambda seconds: cache.set(callback_dedupe.result_key, "/done/")
+
+    # Act
+    response = callback_dedupe.run(handler)
+
+    # Assert
+    assert response.url == "/done/"
+    handler.assert_not_called()
+
+
+def test_duplicate_runs_when_first_request_fails(callback_dedupe, mocker):
+    # Arrange
+    cache.set(callback_dedupe.lock_key, True)
+    mocker.patch.object(dedupe.time, "sleep", side_effect=lambda seconds: cache.clear())
+    handler = mocker.Mock(return_value=HttpResponseRedirect("/retry/"))
+
+    # Act
+    response = callback_dedupe.run(handler)
+
+    # Assert
+    assert response.url == "/retry/"
+    handler.assert_called_once()
+
+
+def test_first_request_saves_result(callback_dedupe):
+    # Act
+    callback_dedupe.run(lambda: logged_in_redirect(SECRET_PATH))
+
+    # Assert
+    assert cache.get(callback_dedupe.result_key) == SECRET_PATH
+    assert cache.get(callback_dedupe.lock_key) is None
+    assert "12345" not in callback_dedupe.key
+
+
+def test_failed_request_does_not_save_result(callback_dedupe):
+    # Act
+    callback_dedupe.run(lambda: HttpResponseRedirect("/"))
+
+    # Assert
+    assert cache.get(callback_dedupe.result_key) is None
+    assert cache.get(callback_dedupe.lock_key) is None
+
+
+async def test_async_concurrent_duplicate(async_callback_request, mocker):
+    # Arrange
+    callback_dedupe = CallbackDedupe.for_request(async_callback_request)
+    await cache.aset(callback_dedupe.lock_key, True)
+    await cache.aset(callback_dedupe.result_key, SECRET_PATH)
+    handler = mocker.AsyncMock()
+
+    # Act
+    response = await callback_dedupe.arun(handler)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    handler.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "backend, expected_ids",
+    [
+        ("django.core.cache.backends.locmem.LocMemCache", ["sso.W005"]),
+        ("django.core.cache.backends.db.DatabaseCache", []),
+    ],
+)
+def test_check_callback_cache(settings, backend, expected_ids):
+    # Arrange
+    settings.CACHES = {"default": {"BACKEND": backend}}
+
+    # Act
+    errors = check_callback_cache(None)
+
+    # Assert
+    assert [error.id for error in errors] == expected_ids
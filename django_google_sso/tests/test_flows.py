@@ -0,0 +1,92 @@
+import pytest
+from google_auth_oauthlib.flow import Flow
+
+from django_google_sso import conf, flows
+from django_google_sso.main import GoogleAuth
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_flow_templates():
+    flows.clear_flow_templates()
+    yield
+    flows.clear_flow_templates()
+
+
+def test_flow_template_is_reused(google_client_config, callback_request, mocker):
+    # Arrange
+    spy = mocker.spy(Flow, "from_client_config")
+
+    # Act
+    first_flow = GoogleAuth(callback_request).flow
+    second_flow = GoogleAuth(callback_request).flow
+
+    # Assert
+    assert spy.call_count == 1
+    assert first_flow is not second_flow
+    assert first_flow.client_config["client_id"] == "client_id"
+    assert first_flow.redirect_uri == second_flow.redirect_uri
+
+
+def test_flow_per_client_credentials(
+    google_client_config, callback_request, monkeypatch, mocker
+):
+    # Arrange
+    spy = mocker.spy(Flow, "from_client_config")
+    clients = iter(["client_a", "client_b", "client_a"])
+    monkeypatch.setattr(conf, "GOOGLE_SSO_CLIENT_ID", lambda request: next(clients))
+
+    # Act
+    flow_ids = [
+        GoogleAuth(callback_request.__class__(callback_request.environ)).flow
+        for _ in range(3)
+    ]
+
+    # Assert
+    assert [flow.client_config["client_id"] for flow in flow_ids] == [
+        "client_a",
+        "client_b",
+        "client_a",
+    ]
+    assert spy.call_count == 2
+
+
+def test_flow_clones_are_isolated(google_client_config, callback_request):
+    # Arrange
+    first_flow = GoogleAuth(callback_request).flow
+    second_flow = GoogleAuth(callback_request).flow
+
+    # Act
+    first_flow.authorization_url(prompt="consent")
+    first_flow.oauth2session.token = {"access_token": "12345", "token_type": "Bearer"}
+
+    # Assert
+    assert first_flow.code_verifier is not None
+    assert second_flow.code_verifier is None
+    assert second_flow.oauth2session.token == {}
+    assert second_flow.oauth2session._state is None
+
+
+def test_flow_templates_are_bounded(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(flows, "FLOW_CACHE_SIZE", 2)
+
+    # Act
+    for client_id in ["client_a", "client_b", "client_c"]:
+        flows.get_flow(
+            {
+                "web": {
+                    "client_id": client_id,
+                    "project_id": "project_id",
+                    "client_secret": "client_secret",
+                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                    "token_uri": "https://oauth2.googleapis.com/token",
+                }
+            },
+            scopes=["openid"],
+            redirect_uri="http://localhost:8000/callback/",
+        )
+
+    # Assert
+    assert [key[0] for key in flows._flow_templates] == ["client_b", "client_c"]
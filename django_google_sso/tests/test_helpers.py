@@ -0,0 +1,136 @@
+import sys
+from types import ModuleType
+
+import pytest
+from django.contrib.sites.models import Site
+from django.urls import path, set_script_prefix
+
+from django_google_sso import helpers
+from django_google_sso.helpers import get_site_domain, is_admin_path, reverse_route
+
+
+@pytest.fixture(autouse=True)
+def fresh_route_cache():
+    helpers.clear_route_cache()
+    yield
+    helpers.clear_route_cache()
+    set_script_prefix("/")
+
+
+@pytest.fixture
+def other_urlconf():
+    module = ModuleType("other_urlconf")
+    module.urlpatterns = [path("other-secret/", lambda request: None, name="secret")]
+    sys.modules[module.__name__] = module
+    yield module.__name__
+    del sys.modules[module.__name__]
+
+
+def test_reverse_route_is_cached(mocker):
+    # Arrange
+    spy = mocker.spy(helpers, "reverse")
+
+    # Act
+    first = reverse_route("admin:index")
+    second = reverse_route("admin:index")
+
+    # Assert
+    assert first == second == "/admin/"
+    assert spy.call_count == 1
+
+
+def test_reverse_route_uses_script_prefix():
+    # Arrange
+    reverse_route("admin:index")
+
+    # Act
+    set_script_prefix("/app/")
+    url = reverse_route("admin:index")
+
+    # Assert
+    assert url == "/app/admin/"
+
+
+def test_reverse_route_on_urlconf_change(settings, other_urlconf):
+    # Arrange
+    assert reverse_route("secret") == "/secret/"
+
+    # Act
+    settings.ROOT_URLCONF = other_urlconf
+
+    # Assert
+    assert reverse_route("secret") == "/other-secret/"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("/admin/", True),
+        ("/admin/auth/user/", True),
+        ("/?next=/admin/auth/", True),
+        ("/secret/", False),
+    ],
+)
+def test_is_admin_path(rf, url, expected):
+    # Arrange
+    request = rf.get(url)
+    request.session = {}
+
+    # Act
+    result = is_admin_path(request)
+
+    # Assert
+    assert result is expected
+
+
+@pytest.mark.django_db
+def test_site_domain_is_cached(rf, settings, django_assert_num_queries):
+    # Arrange
+    del settings.SITE_ID
+    settings.ALLOWED_HOSTS = ["*"]
+    site = Site.objects.create(domain="cached.example.com", name="cached")
+    request = rf.get("/", HTTP_HOST="cached.example.com")
+    get_site_domain(request)
+
+    # Act
+    with django_assert_num_queries(0):
+        domain = get_site_domain(request)
+
+    # Assert
+    assert domain == "cached.example.com"
+    assert site.domain == domain
+
+
+@pytest.mark.django_db
+def test_site_domain_cleared_on_site_delete(rf, settings):
+    # Arrange
+    del settings.SITE_ID
+    settings.ALLOWED_HOSTS = ["*"]
+    site = Site.objects.create(domain="deleted.example.com", name="deleted")
+    request = rf.get("/", HTTP_HOST="deleted.example.com")
+    get_site_domain(request)
+
+    # Act
+    site.delete()
+
+    # Assert
+    with pytest.raises(Site.DoesNotExist):
+        get_site_domain(request)
+
+
+def test_site_domain_expires(rf, settings, mocker):
+    # Arrange
+    settings.SITE_ID = None
+    settings.ALLOWED_HOSTS = ["*"]
+    get_current_site = mocker.patch.object(helpers, "get_current_site")
+    get_current_site.return_value.domain = "expired.example.com"
+    request = rf.get("/", HTTP_HOST="expired.example.com")
+    get_site_domain(request)
+    expired_at = helpers.time.monotonic() + helpers.SITE_CACHE_TIMEOUT + 1
+
+    # Act
+    mocker.patch.object(helpers.time, "monotonic", return_value=expired_at)
+    get_site_domain(request)
+
+    # Assert
+    assert get_current_site.call_count == 2
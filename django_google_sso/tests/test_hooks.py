@@ -0,0 +1,85 @@
+import pytest
+from django.contrib.auth.models import User
+
+from django_google_sso.main import GoogleAuth
+from django_google_sso.tests.conftest import SECRET_PATH
+from django_google_sso.views import acallback
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+HOOK_CALLS = []
+
+
+async def async_pre_validate_user(google_user_data, request):
+    HOOK_CALLS.append("pre_validate")
+    return google_user_data["email"] != "blocked@example.com"
+
+
+async def async_pre_create_user(google_user_data, request):
+    HOOK_CALLS.append("pre_create")
+    return {"is_active": True}
+
+
+async def async_pre_login_user(user, request):
+    HOOK_CALLS.append("pre_login")
+
+
+@pytest.fixture
+def async_hooks(settings):
+    HOOK_CALLS.clear()
+    settings.GOOGLE_SSO_ALWAYS_UPDATE_USER_DATA = False
+    settings.GOOGLE_SSO_PRE_VALIDATE_CALLBACK = (
+        "django_google_sso.tests.test_hooks.async_pre_validate_user"
+    )
+    settings.GOOGLE_SSO_PRE_CREATE_CALLBACK = (
+        "django_google_sso.tests.test_hooks.async_pre_create_user"
+    )
+    settings.GOOGLE_SSO_PRE_LOGIN_CALLBACK = (
+        "django_google_sso.tests.test_hooks.async_pre_login_user"
+    )
+    yield
+    HOOK_CALLS.clear()
+
+
+def test_async_hooks_on_sync_callback(client_with_session, async_hooks, callback_url):
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.status_code == 302
+    assert response.url == SECRET_PATH
+    assert HOOK_CALLS == ["pre_validate", "pre_create", "pre_login"]
+
+
+async def test_async_hooks_on_async_callback(
+    async_hooks, async_callback_request, google_response, mocker, settings
+):
+    # Arrange
+    settings.GOOGLE_SSO_ALLOWABLE_DOMAINS = ["example.com"]
+    mocker.patch.object(GoogleAuth, "flow")
+    mocker.patch.object(GoogleAuth, "get_user_token", return_value="12345")
+    mocker.patch.object(GoogleAuth, "afetch_token", return_value={})
+    mocker.patch.object(GoogleAuth, "aget_user_info", return_value=google_response)
+
+    # Act
+    response = await acallback(async_callback_request)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    assert HOOK_CALLS == ["pre_validate", "pre_create", "pre_login"]
+    assert await User.objects.filter(email=google_response["email"]).aexists()
+
+
+def test_async_pre_validate_blocks_user(
+    client_with_session, async_hooks, callback_url, google_response
+):
+    # Arrange
+    google_response["email"] = "blocked@example.com"
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.status_code == 302
+    assert User.objects.count() == 0
+    assert HOOK_CALLS == ["pre_validate"]
@@ -0,0 +1,118 @@
+import pytest
+import requests
+
+from django_google_sso.main import GoogleAuth
+
+pytestmark = pytest.mark.django_db
+
+ID_TOKEN_CLAIMS = {
+    "sub": "12345",
+    "email": "foo@example.com",
+    "email_verified": True,
+    "name": "Bruce Wayne",
+    "given_name": "Bruce",
+    "family_name": "Wayne",
+    "picture": "https://lh3.googleusercontent.com/a-/12345",
+    "hd": "example.com",
+}
+
+
+@pytest.fixture
+def google_with_id_token(callback_request, google_client_config, settings):
+    settings.GOOGLE_SSO_VERIFY_ID_TOKEN = True
+
+    def build(token: str) -> GoogleAuth:
+        google = GoogleAuth(callback_request)
+        google.flow.oauth2session.token = {"access_token": "12345", "id_token": token}
+        return google
+
+    return build
+
+
+def test_user_info_from_id_token(google_with_id_token, google_certs, mocker):
+    # Arrange
+    request_user_info = mocker.patch.object(GoogleAuth, "request_user_info")
+    google = google_with_id_token(google_certs(**ID_TOKEN_CLAIMS))
+
+    # Act
+    user_info = google.get_user_info()
+
+    # Assert
+    request_user_info.assert_not_called()
+    assert user_info == {
+        "id": "12345",
+        "email": "foo@example.com",
+        "verified_email": True,
+        "name": "Bruce Wayne",
+        "given_name": "Bruce",
+        "family_name": "Wayne",
+        "picture": "https://lh3.googleusercontent.com/a-/12345",
+        "hd": "example.com",
+    }
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"sub": "12345", "email_verified": True},  # missing email
+        {**ID_TOKEN_CLAIMS, "aud": "other_client_id"},  # wrong audience
+        {**ID_TOKEN_CLAIMS, "iss": "https://evil.example.com"},  # wrong issuer
+    ],
+    ids=["missing_claims", "wrong_audience", "wrong_issuer"],
+)
+def test_fallback_to_user_info_api(
+    google_with_id_token, google_certs, google_response, mocker, claims
+):
+    # Arrange
+    request_user_info = mocker.patch.object(
+        GoogleAuth, "request_user_info", return_value=google_response
+    )
+    google = google_with_id_token(google_certs(**claims))
+
+    # Act
+    user_info = google.get_user_info()
+
+    # Assert
+    request_user_info.assert_called_once()
+    assert user_info == google_response
+
+
+def test_fallback_on_certs_error(
+    google_with_id_token, google_certs, google_response, mocker
+):
+    # Arrange
+    token = google_certs(**ID_TOKEN_CLAIMS)
+    google_certs.request_mock.side_effect = requests.ConnectionError("Google is down")
+    request_user_info = mocker.patch.object(
+        GoogleAuth, "request_user_info", return_value=google_response
+    )
+    google = google_with_id_token(token)
+
+    # Act
+    user_info = google.get_user_info()
+
+    # Assert
+    request_user_info.assert_called_once()
+    assert user_info == google_response
+
+
+def test_fallback_without_id_token(google_with_id_token, google_response, mocker):
+    # Arrange
+    mocker.patch.object(GoogleAuth, "request_user_info", return_value=google_response)
+    google = google_with_id_token("")
+
+    # Act / Assert
+    assert google.get_user_info() == google_response
+
+
+def test_id_token_disabled(
+    google_with_id_token, google_certs, google_response, mocker, settings
+):
+    # Arrange
+    settings.GOOGLE_SSO_VERIFY_ID_TOKEN = False
+    mocker.patch.object(GoogleAuth, "request_user_info", return_value=google_response)
+    google = google_with_id_token(google_certs(**ID_TOKEN_CLAIMS))
+
+    # Act / Assert
+    assert google.get_user_info() == google_response
+    google_certs.request_mock.assert_not_called()
@@ -39,3 +39,16 @@ def test_user_with_custom_field_names(custom_user_model, google_response, callba
     # Assert
     assert user.user_name == "foo@example.com"
     assert user.mail == "foo@example.com"
+
+
+def test_google_sso_user_normalised_email(google_response, callback_request):
+    # Arrange
+    google_response["email"] = "Foo@Example.COM"
+
+    # Act
+    helper = UserHelper(google_response, callback_request)
+    user = helper.get_or_create_user()
+
+    # Assert
+    assert user.googlessouser.email == "foo@example.com"
+    assert user.googlessouser.email_domain == "example.com"
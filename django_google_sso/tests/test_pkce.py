@@ -44,7 +44,7 @@ def test_callback_restores_code_verifier(mocker):
 
     # Mock other things to avoid database errors/logic
     mocker.patch("django_google_sso.views.UserHelper")
-    mocker.patch("django_google_sso.views.importlib.import_module")
+    mocker.patch("django_google_sso.views.get_callable")
     mocker.patch("django_google_sso.views.login")
     mocker.patch("django_google_sso.views.send_message")
 
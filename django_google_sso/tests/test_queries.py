@@ -0,0 +1,106 @@
+import pytest
+from django.contrib.auth.models import User
+
+from django_google_sso.models import GoogleSSOUser
+from django_google_sso.queries import QUERY_BUDGETS, QueryBudgetExceeded, QueryCounter
+from django_google_sso.tests.conftest import SECRET_PATH
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def query_budget(settings, mocker):
+    settings.GOOGLE_SSO_QUERY_BUDGET_MODE = "raise"
+    settings.GOOGLE_SSO_AUTO_CREATE_FIRST_SUPERUSER = True
+    settings.GOOGLE_SSO_ALWAYS_UPDATE_USER_DATA = True
+    return mocker.spy(QueryCounter, "check")
+
+
+def test_new_user_within_budget(client_with_session, callback_url, query_budget):
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    counter = query_budget.call_args.args[0]
+    assert GoogleSSOUser.objects.count() == 1
+    assert counter.login_path == "new_user"
+    assert counter.queries == QUERY_BUDGETS["new_user"]
+
+
+def test_returning_user_within_budget(
+    client_with_session, callback_url, google_response, query_budget
+):
+    # Arrange
+    user = User.objects.create(username="foo", email=google_response["email"])
+    GoogleSSOUser.objects.create(user=user, google_id=google_response["id"])
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    counter = query_budget.call_args.args[0]
+    assert response.url == SECRET_PATH
+    assert counter.login_path == "returning_user"
+    assert counter.queries == QUERY_BUDGETS["returning_user"]
+
+
+def test_returning_user_without_google_info(
+    client_with_session, callback_url, google_response, settings, query_budget
+):
+    # Arrange
+    settings.GOOGLE_SSO_SAVE_BASIC_GOOGLE_INFO = False
+    User.objects.create(username="foo", email=google_response["email"])
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    counter = query_budget.call_args.args[0]
+    assert response.url == SECRET_PATH
+    assert GoogleSSOUser.objects.count() == 0
+    assert counter.login_path == "returning_user"
+    assert counter.queries == QUERY_BUDGETS["returning_user"] - 1
+
+
+def test_hook_over_budget(client_with_session, callback_url, settings, query_budget):
+    # Arrange
+    def pre_login_user(user, request):
+        for _ in range(10):
+            User.objects.filter(pk=user.pk).exists()
+
+    settings.GOOGLE_SSO_PRE_LOGIN_CALLBACK = lambda request: pre_login_user
+
+    # Act
+    with pytest.raises(QueryBudgetExceeded):
+        client_with_session.get(callback_url)
+
+
+def test_hook_with_extra_budget(client_with_session, callback_url, settings, query_budget):
+    # Arrange
+    def pre_login_user(user, request):
+        for _ in range(10):
+            User.objects.filter(pk=user.pk).exists()
+
+    settings.GOOGLE_SSO_PRE_LOGIN_CALLBACK = lambda request: pre_login_user
+    settings.GOOGLE_SSO_QUERY_BUDGET_EXTRA = 10
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.url == SECRET_PATH
+
+
+def test_over_budget_log(client_with_session, callback_url, settings, mocker):
+    # Arrange
+    settings.GOOGLE_SSO_QUERY_BUDGET_MODE = "log"
+    mocker.patch.dict("django_google_sso.queries.QUERY_BUDGETS", {"new_user": 0})
+    warning = mocker.patch("django_google_sso.queries.logger.warning")
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    assert "above the budget of 0 queries" in warning.call_args.args[0]
@@ -0,0 +1,74 @@
+import pytest
+from django.core.checks import run_checks
+
+from django_google_sso import hooks, registry
+from django_google_sso.tests.conftest import SECRET_PATH
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+HOOK_CALLS = []
+
+
+def pre_login_user(user, request):
+    HOOK_CALLS.append(user.email)
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    registry.clear_registry()
+    HOOK_CALLS.clear()
+    yield
+    registry.clear_registry()
+    HOOK_CALLS.clear()
+
+
+def test_import_path_once(mocker):
+    # Arrange
+    spy = mocker.spy(registry, "import_string")
+
+    # Act
+    first = registry.import_path("django_google_sso.hooks.pre_login_user")
+    second = registry.import_path("django_google_sso.hooks.pre_login_user")
+
+    # Assert
+    assert first is second is hooks.pre_login_user
+    assert spy.call_count == 1
+
+
+def test_get_callable_accepts_callables():
+    # Act
+    function = registry.get_callable(pre_login_user)
+
+    # Assert
+    assert function is pre_login_user
+
+
+def test_direct_callable_hook(client_with_session, settings, callback_url):
+    # Arrange
+    settings.GOOGLE_SSO_PRE_LOGIN_CALLBACK = lambda request: pre_login_user
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    assert HOOK_CALLS == ["foo@example.com"]
+
+
+@pytest.mark.parametrize(
+    "setting",
+    [
+        "GOOGLE_SSO_PRE_VALIDATE_CALLBACK",
+        "GOOGLE_SSO_AUTHENTICATION_BACKEND",
+    ],
+)
+def test_invalid_path_check(settings, setting):
+    # Arrange
+    setattr(settings, setting, "django_google_sso.hooks.does_not_exist")
+
+    # Act
+    errors = run_checks()
+
+    # Assert
+    assert [error.id for error in errors] == ["sso.E002"]
+    assert setting in errors[0].msg
@@ -0,0 +1,280 @@
+import time
+from unittest.mock import ANY
+
+import pytest
+from django.core import signing
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+
+from django_google_sso.checks.warnings import check_state_store_cache
+from django_google_sso.main import GoogleAuth
+from django_google_sso.states import (
+    PENDING_STATES_SIZE,
+    STATE_COOKIE_NAME,
+    STATE_COOKIE_SALT,
+    CacheStateStore,
+    FlowState,
+    SessionStateStore,
+    SignedCookieStateStore,
+    add_pending_state,
+    get_state_cache_key,
+    pop_pending_state,
+)
+from django_google_sso.tests.conftest import SECRET_PATH
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def signed_cookie_store(settings):
+    settings.GOOGLE_SSO_STATE_STORE = "django_google_sso.states.SignedCookieStateStore"
+
+
+@pytest.fixture
+def state_cookie(client):
+    pending = {
+        "foo": {
+            "next_url": SECRET_PATH,
+            "code_verifier": "verifier",
+            "expires_at": time.time() + 600,
+        }
+    }
+    value = signing.dumps(pending, salt=STATE_COOKIE_SALT, compress=True)
+    client.cookies[STATE_COOKIE_NAME] = value
+    return value
+
+
+def test_start_login_with_signed_cookie(signed_cookie_store, client, mocker, settings):
+    # Arrange
+    flow_mock = mocker.patch.object(GoogleAuth, "flow")
+    flow_mock.authorization_url.return_value = ("https://foo/bar", "foo")
+    flow_mock.code_verifier = "verifier"
+
+    # Act
+    response = client.get(reverse("django_google_sso:oauth_start_login"))
+
+    # Assert
+    cookie = response.cookies[STATE_COOKIE_NAME]
+    assert response.status_code == 302
+    assert settings.SESSION_COOKIE_NAME not in response.cookies
+    assert cookie["httponly"] is True
+    assert cookie["max-age"] == 600
+    assert signing.loads(cookie.value, salt=STATE_COOKIE_SALT) == {
+        "foo": {"next_url": SECRET_PATH, "code_verifier": "verifier", "expires_at": ANY}
+    }
+
+
+def test_callback_with_signed_cookie(
+    signed_cookie_store, client_with_session, state_cookie, callback_url
+):
+    # Arrange
+    flow_mock = GoogleAuth.flow
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    assert response.wsgi_request.user.is_authenticated is True
+    assert flow_mock.code_verifier == "verifier"
+    assert response.cookies[STATE_COOKIE_NAME].value == ""
+
+
+def test_callback_with_tampered_signed_cookie(
+    signed_cookie_store, client, state_cookie, mocker, callback_url
+):
+    # Arrange
+    flow_mock = mocker.patch.object(GoogleAuth, "flow")
+    client.cookies[STATE_COOKIE_NAME] = state_cookie[:-1]
+
+    # Act
+    response = client.get(callback_url)
+
+    # Assert
+    assert response.url == "/"
+    assert response.wsgi_request.user.is_authenticated is False
+    flow_mock.fetch_token.assert_not_called()
+
+
+@pytest.mark.parametrize("state, timeout", [("bar", 600), ("foo", -1)])
+def test_signed_cookie_store_rejects_state(rf, state_cookie, state, timeout):
+    # Arrange
+    request = rf.get("/", HTTP_COOKIE=f"{STATE_COOKIE_NAME}={state_cookie}")
+    store = SignedCookieStateStore(request, timeout)
+
+    # Act
+    flow_state = store.load(state)
+
+    # Assert
+    assert flow_state is None
+
+
+def test_signed_cookie_store_load(rf, state_cookie):
+    # Arrange
+    request = rf.get("/", HTTP_COOKIE=f"{STATE_COOKIE_NAME}={state_cookie}")
+    store = SignedCookieStateStore(request, 600)
+
+    # Act
+    flow_state = store.load("foo")
+
+    # Assert
+    assert flow_state == FlowState(
+        state="foo", next_url=SECRET_PATH, code_verifier="verifier"
+    )
+
+
+@pytest.fixture
+def cache_store(settings):
+    settings.GOOGLE_SSO_STATE_STORE = "django_google_sso.states.CacheStateStore"
+
+
+def test_cache_store_login(cache_store, client_with_session, mocker, callback_url):
+    # Arrange
+    flow_mock = GoogleAuth.flow
+    flow_mock.authorization_url.return_value = ("https://foo/bar", "foo")
+    flow_mock.code_verifier = "verifier"
+    client_with_session.get(reverse("django_google_sso:oauth_start_login"))
+    flow_mock.code_verifier = None
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    assert response.wsgi_request.user.is_authenticated is True
+    assert flow_mock.code_verifier == "verifier"
+    assert cache.get(get_state_cache_key("foo")) is None
+
+
+def test_cache_store_load_once(rf):
+    # Arrange
+    start_store = CacheStateStore(rf.get("/"), 600)
+    start_store.save(FlowState(state="foo", next_url=SECRET_PATH))
+    start_response = HttpResponse()
+    start_store.update_response(start_response)
+    cookie = start_response.cookies[STATE_COOKIE_NAME].value
+    request = rf.get("/", HTTP_COOKIE=f"{STATE_COOKIE_NAME}={cookie}")
+
+    # Act
+    first = CacheStateStore(request, 600).load("foo")
+    second = CacheStateStore(request, 600).load("foo")
+
+    # Assert
+    assert first == FlowState(state="foo", next_url=SECRET_PATH)
+    assert second is None
+
+
+def test_cache_store_requires_cookie(rf):
+    # Arrange
+    CacheStateStore(rf.get("/"), 600).save(FlowState(state="foo", next_url=SECRET_PATH))
+
+    # Act
+    flow_state = CacheStateStore(rf.get("/"), 600).load("foo")
+
+    # Assert
+    assert flow_state is None
+    assert cache.get(get_state_cache_key("foo")) is not None
+
+
+@pytest.mark.parametrize(
+    "caches, expected_ids",
+    [
+        (None, ["sso.E004"]),
+        (
+            {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+            ["sso.W004"],
+        ),
+        ({"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache"}}, []),
+    ],
+)
+def test_check_state_store_cache(cache_store, settings, mocker, caches, expected_ids):
+    # Arrange
+    if caches is not None:
+        settings.CACHES = caches
+    else:
+        settings_mock = mocker.patch("django_google_sso.checks.warnings.settings")
+        settings_mock.is_overridden.return_value = False
+
+    # Act
+    errors = check_state_store_cache(None)
+
+    # Assert
+    assert [error.id for error in errors] == expected_ids
+
+
+def test_concurrent_logins_in_session(client_with_session, callback_url):
+    # Arrange
+    flow_mock = GoogleAuth.flow
+    flow_mock.code_verifier = None
+    start_url = reverse("django_google_sso:oauth_start_login")
+    for state in ("foo", "bar"):
+        flow_mock.authorization_url.return_value = ("https://foo/bar", state)
+        client_with_session.get(start_url)
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.url == SECRET_PATH
+    assert response.wsgi_request.user.is_authenticated is True
+    assert list(client_with_session.session["sso_pending_states"]) == ["bar"]
+
+
+def use_store(store_class, request, action, *args):
+    """Run the store action, keeping the response cookies on the request."""
+    store = store_class(request, 600)
+    result = getattr(store, action)(*args)
+    response = HttpResponse()
+    store.update_response(response)
+    for name, cookie in response.cookies.items():
+        request.COOKIES[name] = cookie.value
+    return result
+
+
+@pytest.mark.parametrize(
+    "store_class", [SessionStateStore, SignedCookieStateStore, CacheStateStore]
+)
+def test_concurrent_logins(callback_request, store_class):
+    # Arrange
+    for state in ("foo", "bar"):
+        flow_state = FlowState(state=state, next_url=f"/{state}/")
+        use_store(store_class, callback_request, "save", flow_state)
+
+    # Act
+    first = use_store(store_class, callback_request, "load", "foo")
+    replay = use_store(store_class, callback_request, "load", "foo")
+    second = use_store(store_class, callback_request, "load", "bar")
+
+    # Assert
+    assert first == FlowState(state="foo", next_url="/foo/")
+    assert replay is None
+    assert second == FlowState(state="bar", next_url="/bar/")
+
+
+def test_add_pending_state_evicts_oldest():
+    # Arrange
+    pending = {}
+
+    # Act
+    for index in range(PENDING_STATES_SIZE + 2):
+        pending = add_pending_state(pending, f"state-{index}", {}, 600)
+
+    # Assert
+    assert len(pending) == PENDING_STATES_SIZE
+    assert "state-0" not in pending and "state-1" not in pending
+    assert list(pending)[-1] == f"state-{PENDING_STATES_SIZE + 1}"
+
+
+def test_pending_state_expires():
+    # Arrange
+    pending = add_pending_state({}, "foo", {"next_url": "/"}, -1)
+    pending = add_pending_state(pending, "bar", {"next_url": "/"}, -1)
+
+    # Act
+    entry = pop_pending_state(pending, "bar")
+    pending = add_pending_state(pending, "baz", {"next_url": "/"}, 600)
+
+    # Assert
+    assert entry is None
+    assert list(pending) == ["baz"]
@@ -55,3 +55,51 @@ async def test_async_view(aclient_with_session, callback_request):
 
     # Assert
     assert "SignWith2" in response_text
+
+
+def test_provider_registry_is_reused(rf, settings, mocker):
+    # Arrange
+    from django_google_sso.templatetags import sso_tags
+
+    sso_tags.build_provider_registry()
+    import_mock = mocker.spy(sso_tags.importlib, "import_module")
+    settings.GOOGLE_SSO_TEXT = lambda request: request.GET["text"]
+
+    # Act
+    first = define_sso_providers({"request": rf.get("/", {"text": "First"})})
+    second = define_sso_providers({"request": rf.get("/", {"text": "Second"})})
+
+    # Assert
+    import_mock.assert_not_called()
+    assert first[0]["text"] == "First"
+    assert second[0]["text"] == "Second"
+    assert first[0]["login_url"] == second[0]["login_url"]
+
+
+def test_provider_registry_cleared_on_setting_changed(rf, settings):
+    # Arrange
+    define_sso_providers({"request": rf.get("/")})
+
+    # Act
+    settings.STATIC_URL = "/assets/"
+    providers = define_sso_providers({"request": rf.get("/")})
+
+    # Assert
+    assert providers[0]["css_url"] == "/assets/django_google_sso/google_button.css"
+
+
+def test_login_url_uses_script_prefix(rf):
+    # Arrange
+    from django.urls import set_script_prefix
+
+    define_sso_providers({"request": rf.get("/")})
+
+    # Act
+    set_script_prefix("/app/")
+    try:
+        providers = define_sso_providers({"request": rf.get("/")})
+    finally:
+        set_script_prefix("/")
+
+    # Assert
+    assert providers[0]["login_url"] == "/app/google_sso/login/"
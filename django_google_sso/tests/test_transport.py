@@ -0,0 +1,133 @@
+from http.client import HTTPMessage
+
+import httpx
+import pytest
+import requests
+from asgiref.sync import async_to_sync
+from requests.adapters import HTTPAdapter
+from requests.cookies import MockRequest, MockResponse
+
+from django_google_sso import conf, transport
+from django_google_sso.main import GOOGLE_USERINFO_URL, GoogleAuth
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_clients():
+    transport.reset_http_clients()
+    yield
+    transport.reset_http_clients()
+
+
+def test_shared_http_session(settings):
+    # Arrange
+    settings.GOOGLE_SSO_HTTP_POOL_CONNECTIONS = 4
+    settings.GOOGLE_SSO_HTTP_POOL_MAXSIZE = 20
+
+    # Act
+    session = transport.get_http_session()
+
+    # Assert
+    adapter = session.get_adapter("https://www.googleapis.com")
+    assert session is transport.get_http_session()
+    assert adapter is transport.get_http_adapter()
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 20
+
+
+@pytest.mark.parametrize("timeout, expected", [(None, 10), (3, 3)])
+def test_default_timeout(mocker, timeout, expected):
+    # Arrange
+    send_mock = mocker.patch.object(HTTPAdapter, "send")
+    adapter = transport.get_http_adapter()
+
+    # Act
+    adapter.send(mocker.Mock(), timeout=timeout)
+
+    # Assert
+    assert send_mock.call_args.kwargs["timeout"] == expected
+
+
+def test_flow_uses_shared_adapter(callback_request, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(conf, "GOOGLE_SSO_CLIENT_ID", "client_id")
+    monkeypatch.setattr(conf, "GOOGLE_SSO_PROJECT_ID", "project_id")
+    monkeypatch.setattr(conf, "GOOGLE_SSO_CLIENT_SECRET", "client_secret")
+    monkeypatch.setattr(conf, "GOOGLE_SSO_CALLBACK_DOMAIN", "localhost:8000")
+
+    # Act
+    flow = GoogleAuth(callback_request).flow
+
+    # Assert
+    adapter = flow.oauth2session.get_adapter("https://oauth2.googleapis.com/token")
+    assert adapter is transport.get_http_adapter()
+
+
+def test_user_info_uses_shared_session(callback_request, google_response, mocker):
+    # Arrange
+    mocker.patch.object(GoogleAuth, "get_user_token", return_value="12345")
+    get_mock = mocker.patch.object(transport.get_http_session(), "get")
+    get_mock.return_value.json.return_value = google_response
+
+    # Act
+    user_info = GoogleAuth(callback_request).get_user_info()
+
+    # Assert
+    assert user_info == google_response
+    get_mock.assert_called_once_with(
+        GOOGLE_USERINFO_URL, headers={"Authorization": "Bearer 12345"}
+    )
+
+
+async def test_async_client_is_reused_on_same_loop():
+    # Act
+    client = transport.get_async_http_client()
+
+    # Assert
+    assert client is transport.get_async_http_client()
+    await client.aclose()
+
+
+def test_async_client_is_closed_with_its_loop():
+    # Arrange
+    async def get_client():
+        return transport.get_async_http_client()
+
+    # Act
+    client = async_to_sync(get_client)()
+
+    # Assert
+    assert client.is_closed is True
+
+
+def test_shared_http_session_ignores_cookies():
+    # Arrange
+    session = transport.get_http_session()
+    request = requests.Request("GET", "https://www.googleapis.com/").prepare()
+    headers = HTTPMessage()
+    headers["Set-Cookie"] = "sid=12345; Domain=googleapis.com; Path=/"
+
+    # Act
+    session.cookies.extract_cookies(MockResponse(headers), MockRequest(request))
+
+    # Assert
+    assert len(session.cookies) == 0
+
+
+async def test_async_client_ignores_cookies(mocker):
+    # Arrange
+    mock_transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, headers={"Set-Cookie": "sid=12345"})
+    )
+    mocker.patch.object(
+        httpx.AsyncClient, "_transport_for_url", return_value=mock_transport
+    )
+    client = transport.get_async_http_client()
+
+    # Act
+    await client.get("https://www.googleapis.com/")
+
+    # Assert
+    assert len(client.cookies) == 0
+    await client.aclose()
@@ -2,10 +2,11 @@ import importlib
 from copy import deepcopy
 
 import pytest
-from django.contrib.auth.models import User
+from django.contrib.auth.models import User, update_last_login
 
 from django_google_sso import conf
 from django_google_sso.main import UserHelper
+from django_google_sso.models import GoogleSSOUser
 
 pytestmark = pytest.mark.django_db
 
@@ -98,8 +99,9 @@ def test_add_all_users_to_staff_list(faker, google_response, callback_request, s
     ]
 
     # Act
-    for email in emails:
+    for google_id, email in enumerate(emails):
         response = deepcopy(google_response)
+        response["id"] = str(google_id)
         response["email"] = email
         helper = UserHelper(response, callback_request)
         helper.get_or_create_user()
@@ -234,3 +236,360 @@ def test_duplicated_emails(google_response, callback_request):
     assert user_one.id == user_two.id
     assert user_one.email == user_two.email
     assert User.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("auto_create_super_user", [True, False])
+async def test_aget_or_create_user(
+    auto_create_super_user, google_response, callback_request, settings
+):
+    # Arrange
+    settings.GOOGLE_SSO_AUTO_CREATE_FIRST_SUPERUSER = auto_create_super_user
+
+    # Act
+    helper = UserHelper(google_response, callback_request)
+    user = await helper.aget_or_create_user()
+
+    # Assert
+    google_sso_user = await GoogleSSOUser.objects.aget(user=user)
+    assert user.first_name == google_response["given_name"]
+    assert user.username == google_response["email"]
+    assert user.is_staff == auto_create_super_user
+    assert user.is_superuser == auto_create_super_user
+    assert google_sso_user.google_id == google_response["id"]
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_afind_user(google_response, callback_request):
+    # Arrange
+    helper = UserHelper(google_response, callback_request)
+    missing_user = await helper.afind_user()
+    await User.objects.acreate(
+        username=google_response["email"], email=google_response["email"].upper()
+    )
+
+    # Act
+    user = await helper.afind_user()
+
+    # Assert
+    assert missing_user is None
+    assert user.username == google_response["email"]
+
+
+def test_superuser_exists_is_cached(
+    google_response, callback_request, django_assert_num_queries
+):
+    # Arrange
+    helper = UserHelper(google_response, callback_request)
+    missing_superuser = helper.superuser_exists()
+
+    # Act
+    with django_assert_num_queries(0):
+        cached_result = helper.superuser_exists()
+    User.objects.create_superuser(username="admin", email="admin@example.com")
+    new_result = helper.superuser_exists()
+
+    # Assert
+    assert missing_superuser is cached_result is False
+    assert new_result is True
+
+
+def test_superuser_exists_uses_email_domain(
+    google_response, callback_request, django_assert_num_queries
+):
+    # Arrange
+    user = User.objects.create_superuser(username="admin", email="admin@example.com")
+    GoogleSSOUser.objects.create(user=user, google_id="1", email_domain="example.com")
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    with django_assert_num_queries(1):
+        result = helper.superuser_exists()
+
+    # Assert
+    assert result is True
+
+
+def test_superuser_cache_kept_on_login(
+    google_response, callback_request, django_assert_num_queries
+):
+    # Arrange
+    user = User.objects.create_superuser(username="admin", email="admin@example.com")
+    helper = UserHelper(google_response, callback_request)
+    helper.superuser_exists()
+
+    # Act
+    update_last_login(None, user)
+    with django_assert_num_queries(0):
+        result = helper.superuser_exists()
+
+    # Assert
+    assert result is True
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_asuperuser_exists(google_response, callback_request):
+    # Arrange
+    helper = UserHelper(google_response, callback_request)
+    missing_superuser = await helper.asuperuser_exists()
+    await User.objects.acreate(
+        username="admin", email="admin@example.com", is_superuser=True
+    )
+
+    # Act
+    result = await helper.asuperuser_exists()
+
+    # Assert
+    assert missing_superuser is False
+    assert result is True
+
+
+def test_find_user_by_google_id(google_response, callback_request):
+    # Arrange
+    user = User.objects.create(username="old-email", email="old@example.com")
+    GoogleSSOUser.objects.create(user=user, google_id=google_response["id"])
+
+    # Act
+    helper = UserHelper(google_response, callback_request)
+    found_user = helper.find_user()
+    returning_user = helper.get_or_create_user()
+
+    # Assert
+    assert found_user == returning_user == user
+    assert User.objects.count() == 1
+
+
+def test_find_user_by_email_on_first_login(
+    google_response, callback_request, django_assert_num_queries
+):
+    # Arrange
+    user = User.objects.create(username="foo", email=google_response["email"])
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    with django_assert_num_queries(2):
+        found_user = helper.find_user()
+
+    # Assert
+    assert found_user == user
+
+
+def test_find_user_by_normalised_email(google_response, callback_request):
+    # Arrange
+    user = User.objects.create(username="foo", email="FOO@example.com")
+    GoogleSSOUser.objects.create(user=user, google_id="old-id", email="foo@example.com")
+
+    # Act
+    helper = UserHelper(google_response, callback_request)
+    found_user = helper.find_user()
+
+    # Assert
+    assert found_user == user
+
+
+def test_find_user_after_email_change(google_response, callback_request):
+    # Arrange
+    renamed_user = UserHelper(google_response, callback_request).get_or_create_user()
+    renamed_user.email = "former@example.com"
+    renamed_user.save()
+    user = User.objects.create(username="bar", email=google_response["email"])
+    google_response["id"] = "67890"
+
+    # Act
+    found_user = UserHelper(google_response, callback_request).get_or_create_user()
+
+    # Assert
+    renamed_user.googlessouser.refresh_from_db()
+    assert found_user == user
+    assert renamed_user.googlessouser.email == "former@example.com"
+    assert renamed_user.googlessouser.google_id == "12345"
+
+
+def test_find_user_prefers_google_id(google_response, callback_request):
+    # Arrange
+    email_user = User.objects.create(username="email-user", email="foo@example.com")
+    GoogleSSOUser.objects.create(
+        user=email_user, google_id="other-id", email="foo@example.com"
+    )
+    google_user = User.objects.create(username="google-user", email="bar@example.com")
+    GoogleSSOUser.objects.create(
+        user=google_user, google_id=google_response["id"], email="bar@example.com"
+    )
+
+    # Act
+    helper = UserHelper(google_response, callback_request)
+    found_user = helper.find_user()
+
+    # Assert
+    assert found_user == google_user
+
+
+def test_find_user_without_google_info(
+    google_response, callback_request, settings, django_assert_num_queries
+):
+    # Arrange
+    settings.GOOGLE_SSO_SAVE_BASIC_GOOGLE_INFO = False
+    User.objects.create(username="foo", email=google_response["email"])
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    with django_assert_num_queries(1):
+        user = helper.find_user()
+
+    # Assert
+    assert user.username == "foo"
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_afind_user_without_google_info(google_response, callback_request, settings):
+    # Arrange
+    settings.GOOGLE_SSO_SAVE_BASIC_GOOGLE_INFO = False
+    helper = UserHelper(google_response, callback_request)
+    user = await User.objects.acreate(username="foo", email=google_response["email"])
+    await GoogleSSOUser.objects.acreate(user=user, google_id=google_response["id"])
+
+    # Act
+    found_user = await helper.afind_user()
+
+    # Assert
+    assert found_user == user
+    assert helper.google_sso_user is None
+
+
+@pytest.fixture
+def returning_user_settings(settings):
+    settings.GOOGLE_SSO_AUTO_CREATE_FIRST_SUPERUSER = False
+    settings.GOOGLE_SSO_ALWAYS_UPDATE_USER_DATA = True
+    settings.GOOGLE_SSO_STAFF_LIST = []
+    settings.GOOGLE_SSO_SUPERUSER_LIST = []
+
+
+def test_returning_user_without_changes(
+    google_response, callback_request, returning_user_settings, django_assert_num_queries
+):
+    # Arrange
+    UserHelper(google_response, callback_request).get_or_create_user()
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    with django_assert_num_queries(1):
+        helper.get_or_create_user()
+
+    # Assert
+    assert helper.user_changed is False
+
+
+def test_returning_user_with_changes(
+    google_response, callback_request, returning_user_settings
+):
+    # Arrange
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    UserHelper(google_response, callback_request).get_or_create_user()
+    google_response["given_name"] = "New Name"
+    google_response["picture"] = "https://example.com/new-picture.png"
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    with CaptureQueriesContext(connection) as queries:
+        user = helper.get_or_create_user()
+
+    # Assert
+    updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+    assert helper.update_fields == {"first_name"}
+    assert len(updates) == 2
+    assert '"first_name"' in updates[0] and '"last_name"' not in updates[0]
+    assert '"picture_url"' in updates[1] and '"locale"' not in updates[1]
+    user.refresh_from_db()
+    assert user.first_name == "New Name"
+    assert user.googlessouser.picture_url == google_response["picture"]
+
+
+def test_returning_user_added_to_superuser_list(
+    google_response, callback_request, returning_user_settings, settings
+):
+    # Arrange
+    user = UserHelper(google_response, callback_request).get_or_create_user()
+    user.is_staff = True
+    user.save()
+    settings.GOOGLE_SSO_SUPERUSER_LIST = [google_response["email"]]
+
+    # Act
+    UserHelper(google_response, callback_request).get_or_create_user()
+
+    # Assert
+    user.refresh_from_db()
+    assert user.is_staff is True
+    assert user.is_superuser is True
+
+
+def test_upsert_google_sso_user(
+    google_response, callback_request, returning_user_settings, django_assert_num_queries
+):
+    # Arrange
+    user = User.objects.create(username="foo", email=google_response["email"])
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    with django_assert_num_queries(1):
+        helper.upsert_google_sso_user(user, helper.get_google_sso_user_defaults(user))
+    google_response["locale"] = "pt-BR"
+    helper.upsert_google_sso_user(user, helper.get_google_sso_user_defaults(user))
+
+    # Assert
+    assert GoogleSSOUser.objects.get(user=user).locale == "pt-BR"
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_ainsert_user_created_concurrently(google_response, callback_request):
+    # Arrange
+    saved_user = await User.objects.acreate(
+        username=google_response["email"], email=google_response["email"]
+    )
+    helper = UserHelper(google_response, callback_request)
+    user = User(**helper.get_user_defaults())
+
+    # Act
+    user, created = await helper.ainsert_user(user)
+
+    # Assert
+    assert created is False
+    assert user.pk == saved_user.pk
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_areturning_user_with_changes(
+    google_response, callback_request, returning_user_settings
+):
+    # Arrange
+    await UserHelper(google_response, callback_request).aget_or_create_user()
+    google_response["given_name"] = "New Name"
+    google_response["picture"] = "https://example.com/new-picture.png"
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    user = await helper.aget_or_create_user()
+
+    # Assert
+    user = await User.objects.select_related("googlessouser").aget(pk=user.pk)
+    assert helper.user_created is False
+    assert user.first_name == "New Name"
+    assert user.googlessouser.picture_url == google_response["picture"]
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_aupsert_google_sso_user(
+    google_response, callback_request, returning_user_settings
+):
+    # Arrange
+    user = await User.objects.acreate(username="foo", email=google_response["email"])
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    await helper.aupsert_google_sso_user(user, helper.get_google_sso_user_defaults(user))
+    google_response["locale"] = "pt-BR"
+    await helper.aupsert_google_sso_user(user, helper.get_google_sso_user_defaults(user))
+
+    # Assert
+    assert (await GoogleSSOUser.objects.aget(user=user)).locale == "pt-BR"
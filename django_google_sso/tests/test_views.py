@@ -1,3 +1,5 @@
+from importlib import import_module
+
 import pytest
 from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
@@ -195,3 +197,74 @@ def test_missing_user_login(client_with_session, settings, google_response, call
     assert User.objects.count() == 0
     assert response.url == "/"
     assert response.wsgi_request.user.is_authenticated is False
+
+
+SESSION_ENGINES = [
+    "django.contrib.sessions.backends.db",
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+    "django.contrib.sessions.backends.signed_cookies",
+]
+
+
+@pytest.fixture(params=SESSION_ENGINES)
+def session_writes(request, settings, monkeypatch):
+    """Record the session writes for each session engine.
+
+    SessionStore.save() calls create() for new sessions, which calls save()
+    again. Only the outer call is recorded, with its `must_create` value.
+    """
+    settings.SESSION_ENGINE = request.param
+    session_store = import_module(request.param).SessionStore
+    original_save = session_store.save
+    writes = []
+    saving = []
+
+    def save(self, must_create=False):
+        if not saving:
+            writes.append(must_create)
+        saving.append(True)
+        try:
+            return original_save(self, must_create=must_create)
+        finally:
+            saving.pop()
+
+    monkeypatch.setattr(session_store, "save", save)
+    return writes
+
+
+def test_start_login_saves_session_once(session_writes, client, mocker):
+    # Arrange
+    flow_mock = mocker.patch.object(GoogleAuth, "flow")
+    flow_mock.authorization_url.return_value = ("https://foo/bar", "foo")
+
+    # Act
+    response = client.get(reverse("django_google_sso:oauth_start_login"))
+
+    # Assert
+    assert response.status_code == 302
+    assert session_writes == [False]
+    assert client.session["sso_state"] == "foo"
+
+
+def test_callback_rotates_and_saves_session(
+    session_writes, client_with_session, callback_url, settings
+):
+    # Arrange
+    session = client_with_session.session
+    session.update({"sso_state": "foo", "sso_next_url": SECRET_PATH})
+    session.save()
+    client_with_session.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    session_writes.clear()
+
+    # Act
+    response = client_with_session.get(callback_url)
+
+    # Assert
+    assert response.status_code == 302
+    assert response.wsgi_request.user.is_authenticated is True
+    # login() rotates the session key, which stores the session under the new key
+    # and deletes the old one (signed cookies only sign it again). Then, the
+    # response saves it once more.
+    rotation = not settings.SESSION_ENGINE.endswith("signed_cookies")
+    assert session_writes == [rotation, False]
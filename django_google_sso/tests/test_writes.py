@@ -0,0 +1,143 @@
+import pytest
+from django.contrib.auth.models import User
+
+from django_google_sso import writes
+from django_google_sso.main import UserHelper
+from django_google_sso.models import GoogleSSOUser
+from django_google_sso.writes import (
+    LocalWriteQueue,
+    ProfileWrite,
+    apply_writes,
+    get_write_queue,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+class ListWriteQueue(writes.BaseWriteQueue):
+    def __init__(self):
+        self.writes = []
+
+    def put(self, write):
+        self.writes.append(write)
+
+
+@pytest.fixture
+def local_queue(mocker):
+    mocker.patch.object(LocalWriteQueue, "start_worker")
+    return LocalWriteQueue()
+
+
+@pytest.fixture
+def deferred_writes_settings(settings):
+    settings.GOOGLE_SSO_AUTO_CREATE_FIRST_SUPERUSER = False
+    settings.GOOGLE_SSO_ALWAYS_UPDATE_USER_DATA = True
+    settings.GOOGLE_SSO_STAFF_LIST = []
+    settings.GOOGLE_SSO_SUPERUSER_LIST = []
+    settings.GOOGLE_SSO_DEFER_PROFILE_WRITES = True
+    settings.GOOGLE_SSO_WRITE_QUEUE = "django_google_sso.tests.test_writes.ListWriteQueue"
+    yield settings
+    writes.reset_write_queue()
+
+
+def test_apply_writes_merges_rows(django_assert_num_queries):
+    # Arrange
+    first = User.objects.create(username="first", email="first@example.com")
+    second = User.objects.create(username="second", email="second@example.com")
+    pending = [
+        ProfileWrite("auth.User", first.pk, {"first_name": "Old"}),
+        ProfileWrite("auth.User", second.pk, {"first_name": "Diana"}),
+        ProfileWrite("auth.User", first.pk, {"first_name": "Bruce"}),
+    ]
+
+    # Act
+    with django_assert_num_queries(1):
+        apply_writes(pending)
+
+    # Assert
+    assert User.objects.get(pk=first.pk).first_name == "Bruce"
+    assert User.objects.get(pk=second.pk).first_name == "Diana"
+    assert User.objects.get(pk=first.pk).email == "first@example.com"
+
+
+def test_local_queue_flush(local_queue):
+    # Arrange
+    user = User.objects.create(username="foo", email="foo@example.com")
+    local_queue.put(ProfileWrite("auth.User", user.pk, {"last_name": "Wayne"}))
+
+    # Act
+    local_queue.flush()
+
+    # Assert
+    user.refresh_from_db()
+    assert user.last_name == "Wayne"
+    assert local_queue._pending == []
+    local_queue.start_worker.assert_called_once()
+
+
+def test_local_queue_wakes_worker_on_full_batch(local_queue):
+    # Arrange
+    local_queue.batch_size = 2
+
+    # Act
+    local_queue.put(ProfileWrite("auth.User", 1, {"last_name": "Wayne"}))
+    first_put = local_queue._wakeup.is_set()
+    local_queue.put(ProfileWrite("auth.User", 2, {"last_name": "Kent"}))
+
+    # Assert
+    assert first_put is False
+    assert local_queue._wakeup.is_set() is True
+
+
+def test_get_write_queue_uses_setting(settings):
+    # Arrange
+    settings.GOOGLE_SSO_WRITE_QUEUE = "django_google_sso.tests.test_writes.ListWriteQueue"
+
+    # Act
+    write_queue = get_write_queue()
+
+    # Assert
+    assert isinstance(write_queue, ListWriteQueue)
+    assert get_write_queue() is write_queue
+
+
+def test_returning_user_defers_profile_writes(
+    google_response, callback_request, deferred_writes_settings, django_assert_num_queries
+):
+    # Arrange
+    UserHelper(google_response, callback_request).get_or_create_user()
+    google_response["given_name"] = "New Name"
+    google_response["picture"] = "https://example.com/new-picture.png"
+    helper = UserHelper(google_response, callback_request)
+
+    # Act
+    with django_assert_num_queries(1):
+        user = helper.get_or_create_user()
+
+    # Assert
+    write_queue = get_write_queue()
+    assert write_queue.writes == [
+        ProfileWrite("auth.User", user.pk, {"first_name": "New Name"}),
+        ProfileWrite(
+            "django_google_sso.GoogleSSOUser",
+            user.googlessouser.pk,
+            {"picture_url": google_response["picture"]},
+        ),
+    ]
+    assert User.objects.get(pk=user.pk).first_name == "Bruce"
+    apply_writes(write_queue.writes)
+    user.refresh_from_db()
+    assert user.first_name == "New Name"
+    assert GoogleSSOUser.objects.get(user=user).picture_url == google_response["picture"]
+
+
+def test_new_user_is_not_deferred(
+    google_response, callback_request, deferred_writes_settings
+):
+    # Act
+    user = UserHelper(google_response, callback_request).get_or_create_user()
+
+    # Assert
+    assert get_write_queue().writes == []
+    assert User.objects.get(pk=user.pk).first_name == "Bruce"
+    assert GoogleSSOUser.objects.get(user=user).picture_url == google_response["picture"]
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from http.cookiejar import CookieJar, CookiePolicy
+from weakref import WeakKeyDictionary
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django_google_sso import conf
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+_lock = threading.Lock()
+_http_adapter: HTTPAdapter | None = None
+_http_session: requests.Session | None = None
+_async_clients: WeakKeyDictionary = WeakKeyDictionary()
+
+
+class BlockAllCookies(CookiePolicy):
+    """Cookie policy which never saves or sends cookies.
+
+    The shared clients are used for all users, so cookies received from
+    Google must not be kept in them.
+    """
+
+    netscape = True
+    rfc2965 = hide_cookie2 = False
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+    def return_ok(self, cookie, request) -> bool:
+        return False
+
+    def domain_return_ok(self, domain, request) -> bool:
+        return False
+
+    def path_return_ok(self, path, request) -> bool:
+        return False
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter which applies a default timeout to all requests."""
+
+    def __init__(self, *args, timeout: float | None = None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def get_http_adapter() -> TimeoutHTTPAdapter:
+    """Return the process-wide HTTP adapter used for Google calls.
+
+    The adapter keeps a keep-alive connection pool per host, so the TLS
+    handshake with Google servers is not repeated on every login.
+    It can be mounted in any `requests.Session`, like the Flow OAuth2Session.
+    """
+    global _http_adapter
+    if _http_adapter is None:
+        with _lock:
+            if _http_adapter is None:
+                _http_adapter = TimeoutHTTPAdapter(
+                    pool_connections=conf.GOOGLE_SSO_HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=conf.GOOGLE_SSO_HTTP_POOL_MAXSIZE,
+                    timeout=conf.GOOGLE_SSO_HTTP_TIMEOUT,
+                )
+    return _http_adapter
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide requests Session used for Google calls."""
+    global _http_session
+    if _http_session is None:
+        adapter = get_http_adapter()
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                session.cookies.set_policy(BlockAllCookies())
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+
+async def _close_on_shutdown(client: "httpx.AsyncClient") -> None:
+    """Wait until the event loop shuts down, then close the client.
+
+    `asyncio.run`, also used by `async_to_sync` for each request of async
+    views served by WSGI, cancels the pending tasks before closing the loop.
+    """
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await client.aclose()
+
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    """Return the httpx AsyncClient for the running event loop.
+
+    httpx connections are bound to the event loop where they were opened,
+    so one pooled client is kept for each running loop, and closed when
+    the loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        pool_connections = conf.GOOGLE_SSO_HTTP_POOL_CONNECTIONS
+        pool_maxsize = conf.GOOGLE_SSO_HTTP_POOL_MAXSIZE
+        client = httpx.AsyncClient(
+            timeout=conf.GOOGLE_SSO_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=pool_connections * pool_maxsize,
+                max_keepalive_connections=pool_maxsize,
+            ),
+            cookies=CookieJar(policy=BlockAllCookies()),
+        )
+        # The loop only keeps weak references to its tasks.
+        entry = (client, loop.create_task(_close_on_shutdown(client)))
+        _async_clients[loop] = entry
+    return entry[0]
+
+
+def reset_http_clients() -> None:
+    """Discard the pooled clients. They will be rebuilt on next use."""
+    global _http_adapter, _http_session
+    with _lock:
+        if _http_session is not None:
+            _http_session.close()
+        _http_adapter = None
+        _http_session = None
+        for loop, (_, closer) in list(_async_clients.items()):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(closer.cancel)
+        _async_clients.clear()
@@ -1,12 +1,18 @@
 from django.urls import path
 
 from django_google_sso import conf, views
+from django_google_sso.helpers import use_async_views
 
 app_name = "django_google_sso"
 
 urlpatterns = []
 
-if conf.GOOGLE_SSO_ENABLED:
+if conf.GOOGLE_SSO_ENABLED and use_async_views():
+    urlpatterns += [
+        path("login/", views.astart_login, name="oauth_start_login"),
+        path("callback/", views.acallback, name="oauth_callback"),
+    ]
+elif conf.GOOGLE_SSO_ENABLED:
     urlpatterns += [
         path("login/", views.start_login, name="oauth_start_login"),
         path("callback/", views.callback, name="oauth_callback"),
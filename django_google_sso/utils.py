@@ -1,7 +1,6 @@
-import asyncio
 from typing import Any, Callable, Coroutine
 
-from asgiref.sync import sync_to_async
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
 from django.contrib import messages
 from loguru import logger
 
@@ -28,7 +27,16 @@ def async_(
     func: Callable,
 ) -> Callable[..., Any] | Callable[[Any, Any], Coroutine[Any, Any, Any]]:
     """Returns a coroutine function."""
-    return func if asyncio.iscoroutinefunction(func) else sync_to_async(func)
+    return func if iscoroutinefunction(func) else sync_to_async(func)
+
+
+def sync_(func: Callable) -> Callable[..., Any]:
+    """Returns a sync function.
+
+    Coroutine functions are run by `async_to_sync`, in a new event loop
+    from a thread pool, when called from sync code.
+    """
+    return async_to_sync(func) if iscoroutinefunction(func) else func
 
 
 async def adefine_sso_providers(request):
@@ -1,15 +1,43 @@
-import importlib
+from collections.abc import Callable
+from typing import Any
 from urllib.parse import urlparse
 
-from django.contrib.auth import login
+from asgiref.sync import sync_to_async
+from django.contrib.auth import alogin, login
 from django.http import HttpRequest, HttpResponseRedirect
-from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_http_methods
 from loguru import logger
 
+from django_google_sso.credentials import save_credentials
+from django_google_sso.dedupe import CallbackDedupe, logged_in_redirect
+from django_google_sso.helpers import reverse_route
 from django_google_sso.main import GoogleAuth, UserHelper
-from django_google_sso.utils import send_message, show_credential
+from django_google_sso.queries import QueryCounter, aquery_budget, query_budget
+from django_google_sso.registry import get_callable, import_path
+from django_google_sso.states import BaseStateStore, FlowState, get_state_store
+from django_google_sso.utils import async_, send_message, show_credential, sync_
+
+ASYNC_CALLBACK_SSO_SETTINGS = (
+    "allowable_domains",
+    "always_update_user_data",
+    "authentication_backend",
+    "auto_create_first_superuser",
+    "auto_create_users",
+    "default_locale",
+    "pre_create_callback",
+    "pre_create_user_return_full_args",
+    "pre_login_callback",
+    "pre_validate_callback",
+    "save_access_token",
+    "save_basic_google_info",
+    "save_credentials",
+    "session_cookie_age",
+    "show_failed_login_message",
+    "staff_list",
+    "superuser_list",
+    "verify_id_token",
+)
 
 
 @require_http_methods(["GET"])
@@ -26,111 +54,280 @@ def start_login(request: HttpRequest) -> HttpResponseRedirect:
         )
     else:
         next_url = google.get_sso_value("next_url")
-        clean_param = reverse(next_url)
+        clean_param = reverse_route(next_url)
     next_path = urlparse(clean_param).path
 
     # Get Google Auth URL
     prompt = google.get_sso_value("authorization_prompt")
     auth_url, state = google.flow.authorization_url(prompt=prompt)
 
-    # Save data on Session
-    timeout = google.get_sso_value("timeout")
-    if not request.session.session_key:
-        request.session.create()
-    request.session.set_expiry(timeout * 60)
-    request.session["sso_state"] = state
-    request.session["sso_next_url"] = next_path
-    if isinstance(getattr(google.flow, "code_verifier", None), str):
-        request.session["sso_code_verifier"] = google.flow.code_verifier
-    request.session.save()
+    # Save the flow state. With the default store, the SessionMiddleware saves it
+    # once, on the response.
+    code_verifier = getattr(google.flow, "code_verifier", None)
+    state_store = _get_state_store(request, google)
+    state_store.save(
+        FlowState(
+            state=state,
+            next_url=next_path,
+            code_verifier=code_verifier if isinstance(code_verifier, str) else None,
+        )
+    )
 
     # Redirect User
-    return HttpResponseRedirect(auth_url)
+    response = HttpResponseRedirect(auth_url)
+    state_store.update_response(response)
+    return response
 
 
 @require_http_methods(["GET"])
-def callback(request: HttpRequest) -> HttpResponseRedirect:
-    google = GoogleAuth(request)
-    login_failed_url = reverse(google.get_sso_value("login_failed_url"))
+async def astart_login(request: HttpRequest) -> HttpResponseRedirect:
+    return await sync_to_async(start_login)(request)
+
+
+def _get_state_store(request: HttpRequest, google: GoogleAuth) -> BaseStateStore:
+    timeout = google.get_sso_value("timeout")
+    return get_state_store(request, timeout * 60)
+
+
+def _check_callback_request(
+    request: HttpRequest, google: GoogleAuth, state_store: BaseStateStore
+) -> tuple[str, str, FlowState | None, str | None]:
+    """Check the callback request before the token exchange.
+
+    :return: login failed url, next url, the flow state and the error message, if any.
+    """
+    login_failed_url = reverse_route(google.get_sso_value("login_failed_url"))
     code = request.GET.get("code")
-    state = request.GET.get("state")
+    flow_state = state_store.load(request.GET.get("state"))
 
-    next_url_from_session = request.session.get("sso_next_url")
-    next_url_from_conf = reverse(google.get_sso_value("next_url"))
-    next_url = next_url_from_session if next_url_from_session else next_url_from_conf
+    next_url_from_state = flow_state.next_url if flow_state else None
+    next_url_from_conf = reverse_route(google.get_sso_value("next_url"))
+    next_url = next_url_from_state if next_url_from_state else next_url_from_conf
 
     # Check if Google SSO is enabled
     enabled, message = google.check_enabled(next_url)
     if not enabled:
-        send_message(request, _(message))
-        return HttpResponseRedirect(login_failed_url)
+        return login_failed_url, next_url, flow_state, message
 
     # First, check for authorization code
     if not code:
-        send_message(request, _("Authorization Code not received from SSO."))
-        return HttpResponseRedirect(login_failed_url)
+        return (
+            login_failed_url,
+            next_url,
+            flow_state,
+            "Authorization Code not received from SSO.",
+        )
 
     # Then, check state.
-    request_state = request.session.get("sso_state")
+    if flow_state is None:
+        return login_failed_url, next_url, flow_state, "State Mismatch. Time expired?"
+
+    return login_failed_url, next_url, flow_state, None
 
-    if not request_state or state != request_state:
-        send_message(request, _("State Mismatch. Time expired?"))
+
+def _check_async_callback_request(
+    request: HttpRequest, google: GoogleAuth, state_store: BaseStateStore
+) -> tuple[str, str, FlowState | None, str | None]:
+    """Check the callback request and prepare the flow used after the check.
+
+    Callable settings and the flow redirect uri can run sync code, like
+    database queries, so the async callback resolves them here, outside
+    the event loop.
+    """
+    result = _check_callback_request(request, google, state_store)
+    _login_failed_url, _next_url, flow_state, error_message = result
+    if not error_message:
+        google.sso_settings.resolve(ASYNC_CALLBACK_SSO_SETTINGS)
+        _restore_code_verifier(google, flow_state)
+    return result
+
+
+def _restore_code_verifier(google: GoogleAuth, flow_state: FlowState) -> None:
+    if flow_state.code_verifier:
+        google.flow.code_verifier = flow_state.code_verifier
+
+
+def _token_error(
+    request: HttpRequest, google: GoogleAuth, error: Exception, login_failed_url: str
+) -> HttpResponseRedirect:
+    send_message(request, _(f"Error while fetching token from SSO: {error}."))
+    logger.debug(
+        f"GOOGLE_SSO_CLIENT_ID: {show_credential(google.get_sso_value('client_id'))}"
+    )
+    logger.debug(
+        f"GOOGLE_SSO_PROJECT_ID: {show_credential(google.get_sso_value('project_id'))}"
+    )
+    logger.debug(
+        f"GOOGLE_SSO_CLIENT_SECRET: "
+        f"{show_credential(google.get_sso_value('client_secret'))}"
+    )
+    return HttpResponseRedirect(login_failed_url)
+
+
+@require_http_methods(["GET"])
+def callback(request: HttpRequest) -> HttpResponseRedirect:
+    google = GoogleAuth(request)
+    state_store = _get_state_store(request, google)
+    response = CallbackDedupe.for_request(request).run(
+        lambda: _callback(request, google, state_store)
+    )
+    state_store.update_response(response)
+    return response
+
+
+def _callback(
+    request: HttpRequest, google: GoogleAuth, state_store: BaseStateStore
+) -> HttpResponseRedirect:
+    login_failed_url, next_url, flow_state, error_message = _check_callback_request(
+        request, google, state_store
+    )
+    if error_message:
+        send_message(request, _(error_message))
         return HttpResponseRedirect(login_failed_url)
 
     # Get Access Token from Google
     try:
-        code_verifier = request.session.get("sso_code_verifier")
-        if code_verifier:
-            google.flow.code_verifier = code_verifier
-        google.flow.fetch_token(code=code)
+        _restore_code_verifier(google, flow_state)
+        google.flow.fetch_token(code=request.GET.get("code"))
     except Exception as error:
-        send_message(request, _(f"Error while fetching token from SSO: {error}."))
-        logger.debug(
-            f"GOOGLE_SSO_CLIENT_ID: {show_credential(google.get_sso_value('client_id'))}"
-        )
-        logger.debug(
-            f"GOOGLE_SSO_PROJECT_ID: {show_credential(google.get_sso_value('project_id'))}"
-        )
-        logger.debug(
-            f"GOOGLE_SSO_CLIENT_SECRET: "
-            f"{show_credential(google.get_sso_value('client_secret'))}"
+        return _token_error(request, google, error, login_failed_url)
+
+    # Get User Info from Google
+    google_user_data = google.get_user_info()
+    with query_budget() as budget:
+        return _login_google_user(
+            request, google, google_user_data, login_failed_url, next_url, budget
         )
+
+
+@require_http_methods(["GET"])
+async def acallback(request: HttpRequest) -> HttpResponseRedirect:
+    google = GoogleAuth(request)
+    state_store = await sync_to_async(_get_state_store)(request, google)
+    response = await CallbackDedupe.for_request(request).arun(
+        lambda: _acallback(request, google, state_store)
+    )
+    state_store.update_response(response)
+    return response
+
+
+async def _acallback(
+    request: HttpRequest, google: GoogleAuth, state_store: BaseStateStore
+) -> HttpResponseRedirect:
+    check_request = sync_to_async(_check_async_callback_request)
+    login_failed_url, next_url, _flow_state, error_message = await check_request(
+        request, google, state_store
+    )
+    if error_message:
+        send_message(request, _(error_message))
         return HttpResponseRedirect(login_failed_url)
 
+    # Get Access Token from Google
+    try:
+        await google.afetch_token(code=request.GET.get("code"))
+    except Exception as error:  # noqa: BLE001 - any token error fails the login
+        return await sync_to_async(_token_error)(request, google, error, login_failed_url)
+
     # Get User Info from Google
-    google_user_data = google.get_user_info()
+    google_user_data = await google.aget_user_info()
+    async with aquery_budget() as budget:
+        return await _alogin_google_user(
+            request, google, google_user_data, login_failed_url, next_url, budget
+        )
+
+
+def _get_callback_function(google: GoogleAuth, key: str) -> Callable:
+    return get_callable(google.get_sso_value(key))
+
+
+def _invalid_email_response(
+    request: HttpRequest, user_helper: UserHelper, login_failed_url: str
+) -> HttpResponseRedirect:
+    send_message(
+        request,
+        _(
+            f"Email address not allowed: {user_helper.user_info_email}. "
+            f"Please contact your administrator."
+        ),
+    )
+    return HttpResponseRedirect(login_failed_url)
+
+
+def _save_access_token(request: HttpRequest, google: GoogleAuth) -> None:
+    save_access_token = google.get_sso_value("save_access_token")
+    if save_access_token:
+        access_token = google.get_user_token()
+        request.session["google_sso_access_token"] = access_token
+
+
+def _save_credentials(google: GoogleAuth, user: Any) -> None:
+    if google.get_sso_value("save_credentials"):
+        save_credentials(user, google.flow.credentials)
+
+
+def _failed_login_response(
+    request: HttpRequest,
+    google: GoogleAuth,
+    user: Any,
+    google_user_data: dict,
+    auto_create_users: bool,
+    login_failed_url: str,
+) -> HttpResponseRedirect:
+    failed_login_message = f"User not found - Email: '{google_user_data['email']}'"
+    if not user and not auto_create_users:
+        failed_login_message += ". Auto-Create is disabled."
+
+    if user and not user.is_active:
+        failed_login_message = f"User is not active: '{google_user_data['email']}'"
+
+    show_failed_login_message = google.get_sso_value("show_failed_login_message")
+    if show_failed_login_message:
+        send_message(request, _(failed_login_message), level="warning")
+    else:
+        logger.warning(failed_login_message)
+
+    return HttpResponseRedirect(login_failed_url)
+
+
+def _get_authentication_backend(google: GoogleAuth) -> str | None:
+    # If exists, let's make a sanity check on it
+    # Because Django does not raise errors if backend is wrong
+    authentication_backend = google.get_sso_value("authentication_backend")
+    if authentication_backend:
+        try:
+            import_path(authentication_backend)
+        except ImportError as error:
+            raise ImportError(
+                f"Authentication Backend invalid: {authentication_backend}"
+            ) from error
+    return authentication_backend
+
+
+def _login_google_user(
+    request: HttpRequest,
+    google: GoogleAuth,
+    google_user_data: dict,
+    login_failed_url: str,
+    next_url: str,
+    budget: QueryCounter,
+) -> HttpResponseRedirect:
+    """Validate, create and login the user received from Google."""
     user_helper = UserHelper(google_user_data, request)
 
     # Run Pre-Validate Callback
-    pre_validate_callback = google.get_sso_value("pre_validate_callback")
-    module_path = ".".join(pre_validate_callback.split(".")[:-1])
-    pre_validate_fn = pre_validate_callback.split(".")[-1]
-    module = importlib.import_module(module_path)
-    user_is_valid = getattr(module, pre_validate_fn)(google_user_data, request)
+    pre_validate_fn = _get_callback_function(google, "pre_validate_callback")
+    user_is_valid = sync_(pre_validate_fn)(google_user_data, request)
 
     # Check if User Info is valid to login
     if not user_helper.email_is_valid or not user_is_valid:
-        send_message(
-            request,
-            _(
-                f"Email address not allowed: {user_helper.user_info_email}. "
-                f"Please contact your administrator."
-            ),
-        )
-        return HttpResponseRedirect(login_failed_url)
+        return _invalid_email_response(request, user_helper, login_failed_url)
 
     # Save Token in Session
-    save_access_token = google.get_sso_value("save_access_token")
-    if save_access_token:
-        access_token = google.get_user_token()
-        request.session["google_sso_access_token"] = access_token
+    _save_access_token(request, google)
 
     # Run Pre-Create Callback
-    pre_create_callback = google.get_sso_value("pre_create_callback")
-    module_path = ".".join(pre_create_callback.split(".")[:-1])
-    pre_login_fn = pre_create_callback.split(".")[-1]
-    module = importlib.import_module(module_path)
-    extra_users_args = getattr(module, pre_login_fn)(google_user_data, request)
+    pre_create_fn = _get_callback_function(google, "pre_create_callback")
+    extra_users_args = sync_(pre_create_fn)(google_user_data, request)
 
     # Get or Create User
     auto_create_users = google.get_sso_value("auto_create_users")
@@ -139,49 +336,85 @@ def callback(request: HttpRequest) -> HttpResponseRedirect:
     else:
         user = user_helper.find_user()
 
+    budget.login_path = user_helper.login_path
     if not user or not user.is_active:
-        failed_login_message = f"User not found - Email: '{google_user_data['email']}'"
-        if not user and not auto_create_users:
-            failed_login_message += ". Auto-Create is disabled."
+        return _failed_login_response(
+            request, google, user, google_user_data, auto_create_users, login_failed_url
+        )
 
-        if user and not user.is_active:
-            failed_login_message = f"User is not active: '{google_user_data['email']}'"
+    # Run Pre-Login Callback
+    pre_login_fn = _get_callback_function(google, "pre_login_callback")
+    sync_(pre_login_fn)(user, request)
 
-        show_failed_login_message = google.get_sso_value("show_failed_login_message")
-        if show_failed_login_message:
-            send_message(request, _(failed_login_message), level="warning")
-        else:
-            logger.warning(failed_login_message)
+    # Get Authentication Backend
+    authentication_backend = _get_authentication_backend(google)
 
-        return HttpResponseRedirect(login_failed_url)
+    # Login User. `login()` rotates the session key, and the SessionMiddleware
+    # saves the session once, on the response.
+    cookie_age = google.get_sso_value("session_cookie_age")
+    with budget.pause():
+        _save_credentials(google, user)
+        login(request, user, authentication_backend)
+    request.session.set_expiry(cookie_age)
+
+    return logged_in_redirect(next_url)
 
-    request.session.save()
+
+async def _alogin_google_user(
+    request: HttpRequest,
+    google: GoogleAuth,
+    google_user_data: dict,
+    login_failed_url: str,
+    next_url: str,
+    budget: QueryCounter,
+) -> HttpResponseRedirect:
+    """Validate, create and login the user received from Google.
+
+    Async version of `_login_google_user`. User queries use the Django async ORM.
+    """
+    user_helper = UserHelper(google_user_data, request)
+
+    # Run Pre-Validate Callback
+    pre_validate_fn = _get_callback_function(google, "pre_validate_callback")
+    user_is_valid = await async_(pre_validate_fn)(google_user_data, request)
+
+    # Check if User Info is valid to login
+    if not user_helper.email_is_valid or not user_is_valid:
+        return _invalid_email_response(request, user_helper, login_failed_url)
+
+    # Save Token in Session
+    _save_access_token(request, google)
+
+    # Run Pre-Create Callback
+    pre_create_fn = _get_callback_function(google, "pre_create_callback")
+    extra_users_args = await async_(pre_create_fn)(google_user_data, request)
+
+    # Get or Create User
+    auto_create_users = google.get_sso_value("auto_create_users")
+    if auto_create_users:
+        user = await user_helper.aget_or_create_user(extra_users_args)
+    else:
+        user = await user_helper.afind_user()
+
+    budget.login_path = user_helper.login_path
+    if not user or not user.is_active:
+        return _failed_login_response(
+            request, google, user, google_user_data, auto_create_users, login_failed_url
+        )
 
     # Run Pre-Login Callback
-    pre_login_callback = google.get_sso_value("pre_login_callback")
-    module_path = ".".join(pre_login_callback.split(".")[:-1])
-    pre_login_fn = pre_login_callback.split(".")[-1]
-    module = importlib.import_module(module_path)
-    getattr(module, pre_login_fn)(user, request)
+    pre_login_fn = _get_callback_function(google, "pre_login_callback")
+    await async_(pre_login_fn)(user, request)
 
     # Get Authentication Backend
-    # If exists, let's make a sanity check on it
-    # Because Django does not raise errors if backend is wrong
-    authentication_backend = google.get_sso_value("authentication_backend")
-    if authentication_backend:
-        module_path = ".".join(authentication_backend.split(".")[:-1])
-        backend_auth_class = authentication_backend.split(".")[-1]
-        try:
-            module = importlib.import_module(module_path)
-            getattr(module, backend_auth_class)
-        except (ImportError, AttributeError) as error:
-            raise ImportError(
-                f"Authentication Backend invalid: {authentication_backend}"
-            ) from error
+    authentication_backend = _get_authentication_backend(google)
 
-    # Login User
+    # Login User. `login()` rotates the session key, and the SessionMiddleware
+    # saves the session once, on the response.
     cookie_age = google.get_sso_value("session_cookie_age")
-    login(request, user, authentication_backend)
+    with budget.pause():
+        await sync_to_async(_save_credentials)(google, user)
+        await alogin(request, user, authentication_backend)
     request.session.set_expiry(cookie_age)
 
-    return HttpResponseRedirect(next_url)
+    return logged_in_redirect(next_url)
@@ -0,0 +1,151 @@
+import atexit
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.apps import apps
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from loguru import logger
+
+from django_google_sso import conf
+
+WRITE_QUEUE_INTERVAL = 1.0  # seconds
+WRITE_QUEUE_BATCH_SIZE = 500
+
+# Fields which are not needed to finish the login, and can be saved later.
+DEFERRED_USER_FIELDS = {"first_name", "last_name"}
+DEFERRED_GOOGLE_SSO_USER_FIELDS = {"picture_url", "locale"}
+
+
+@dataclass(frozen=True)
+class ProfileWrite:
+    """Fields to be saved for a single row.
+
+    Only contains serializable values, so custom queues can send it to
+    other processes, like a Celery task calling `apply_writes`.
+    """
+
+    model_label: str
+    pk: Any
+    fields: dict[str, Any] = field(default_factory=dict)
+
+
+def apply_writes(writes: Iterable[ProfileWrite]) -> None:
+    """Save the writes, using one `bulk_update` per model and set of fields.
+
+    Writes for the same row are merged, and the last value wins.
+    """
+    rows: dict[tuple[str, Any], dict[str, Any]] = {}
+    for write in writes:
+        rows.setdefault((write.model_label, write.pk), {}).update(write.fields)
+
+    batches: dict[tuple[str, tuple[str, ...]], list] = defaultdict(list)
+    for (model_label, pk), fields in rows.items():
+        model = apps.get_model(model_label)
+        batches[(model_label, tuple(sorted(fields)))].append(model(pk=pk, **fields))
+
+    for (model_label, field_names), objs in batches.items():
+        model = apps.get_model(model_label)
+        model.objects.bulk_update(objs, field_names, batch_size=WRITE_QUEUE_BATCH_SIZE)
+        logger.debug(f"Saved {len(objs)} {model_label} rows: {', '.join(field_names)}")
+
+
+class BaseWriteQueue:
+    """Queue for profile writes, deferred out of the login request."""
+
+    def put(self, write: ProfileWrite) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Save all pending writes now."""
+
+
+class LocalWriteQueue(BaseWriteQueue):
+    """In-process queue, flushed in batches by a background thread.
+
+    Pending writes are also flushed when the process exits. Writes still
+    pending when the process is killed are lost, and saved again on the
+    next login of the user.
+    """
+
+    def __init__(
+        self,
+        interval: float = WRITE_QUEUE_INTERVAL,
+        batch_size: int = WRITE_QUEUE_BATCH_SIZE,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: list[ProfileWrite] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    def put(self, write: ProfileWrite) -> None:
+        with self._lock:
+            self._pending.append(write)
+            pending = len(self._pending)
+        self.start_worker()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            writes, self._pending = self._pending, []
+        if writes:
+            apply_writes(writes)
+
+    def start_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(
+                target=self._run, name="django-google-sso-writes", daemon=True
+            )
+            self._worker.start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as error:  # noqa: BLE001 - keep the worker running
+                logger.error(f"Error saving Google SSO profile data: {error}")
+            finally:
+                close_old_connections()
+
+
+_write_queue: BaseWriteQueue | None = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> BaseWriteQueue:
+    """Return the queue defined in GOOGLE_SSO_WRITE_QUEUE."""
+    global _write_queue
+    if _write_queue is None:
+        from django_google_sso.registry import import_path
+
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = import_path(conf.GOOGLE_SSO_WRITE_QUEUE)()
+    return _write_queue
+
+
+def reset_write_queue(*, setting: str | None = None, **kwargs) -> None:
+    """Flush and discard the current queue."""
+    global _write_queue
+    if setting is not None and setting != "GOOGLE_SSO_WRITE_QUEUE":
+        return
+    with _write_queue_lock:
+        write_queue, _write_queue = _write_queue, None
+    if write_queue is not None:
+        write_queue.flush()
+
+
+setting_changed.connect(reset_write_queue)